@@ -1,18 +1,8 @@
-
-from .models import UserNotification
+from .notifications import unread_summary
 
 def notification_count(request):
+    # Сам список уведомлений выпадающее меню подгружает при открытии (accounts.views.notifications_list)
     if request.user.is_authenticated:
-        count = UserNotification.objects.filter(user=request.user, is_read=False).count()
+        count, _ = unread_summary(request)
         return {'notification_count': count}
     return {}
-
-
-
-def notification_context(request):
-    if request.user.is_authenticated:
-        notifs = UserNotification.objects.filter(user=request.user).order_by('-created_at')
-        return {
-            'notifications': notifs,
-        }
-    return {}
\ No newline at end of file
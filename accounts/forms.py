@@ -47,7 +47,7 @@ class CustomSignupForm(SignupForm):
 class UserEditForm(forms.ModelForm):
     class Meta:
         model = CustomUser
-        fields = ['username', 'email', 'avatar', 'phone', 'birth_date', 'bio']
+        fields = ['username', 'email', 'avatar', 'phone', 'birth_date', 'bio', 'notification_digest']
         widgets = {
             'birth_date': forms.DateInput(attrs={'type': 'date'}),
             'bio': forms.Textarea(attrs={'rows': 4}),
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import resource
+import threading
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import reverse
+
+from accounts import push
+from accounts.models import CustomUser, UserNotification
+from config.asgi import application
+
+PREFIX = 'sse-loadtest-'
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 1) if values else None
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест SSE-уведомлений: тысячи одновременных подключений к ASGI-приложению '
+            'в одном процессе и время доставки через Redis pub/sub')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=2000, help='Число одновременных подключений')
+        parser.add_argument('--users', type=int, default=200, help='Между скольких пользователей их распределить')
+        parser.add_argument('--rounds', type=int, default=3, help='Сколько раз опубликовать уведомления')
+        parser.add_argument('--connect-timeout', type=float, default=60)
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['users'] < 1:
+            raise CommandError('--clients и --users должны быть положительными')
+        users, cookies = self.create_users(options['users'])
+        try:
+            # Поток не должен закончиться посреди теста
+            with override_settings(NOTIFICATION_PUSH=True, NOTIFICATION_STREAM_TIMEOUT=3600):
+                report = asyncio.run(self.run(users, cookies, options))
+        finally:
+            CustomUser.objects.filter(username__startswith=PREFIX).delete()
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    def create_users(self, count):
+        CustomUser.objects.filter(username__startswith=PREFIX).delete()
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'{PREFIX}{i}', email=f'{PREFIX}{i}@example.com') for i in range(count)
+        ])
+        cookies = []
+        for user in users:
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            cookies.append(f'{settings.SESSION_COOKIE_NAME}={session.session_key}'.encode())
+        return users, cookies
+
+    async def run(self, users, cookies, options):
+        path = reverse('notifications_stream')
+        clients = options['clients']
+        received = [asyncio.Event() for _ in range(clients)]
+        arrivals = {}
+
+        async def client(index):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'query_string': b'', 'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'cookie', cookies[index % len(cookies)])],
+                'client': ('127.0.0.1', 10000 + index), 'server': ('localhost', 80),
+            }
+            requested = False
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await asyncio.Future()  # клиент не отключается сам
+
+            async def send(message):
+                if message['type'] == 'http.response.start' and message['status'] != 200:
+                    raise CommandError(f'Поток ответил {message["status"]}')
+                if message['type'] == 'http.response.body' and b'event: notification' in message.get('body', b''):
+                    arrivals.setdefault(index, time.monotonic())
+                    received[index].set()
+
+            await application(scope, receive, send)
+
+        started = time.monotonic()
+        tasks = [asyncio.ensure_future(client(i)) for i in range(clients)]
+        try:
+            while push.hub.subscriber_count() < clients or not push.hub.ready or not push.hub.ready.is_set():
+                failed = [t for t in tasks if t.done()]
+                if failed:
+                    failed[0].result()
+                    raise CommandError('Поток завершился раньше времени')
+                if time.monotonic() - started > options['connect_timeout']:
+                    raise CommandError(f'Подключилось только {push.hub.subscriber_count()} из {clients}')
+                await asyncio.sleep(0.05)
+            connect_time = time.monotonic() - started
+            # Подключения не держат потоков: их число не растёт с --clients
+            threads = threading.active_count()
+
+            rounds = []
+            for number in range(options['rounds']):
+                for event in received:
+                    event.clear()
+                arrivals.clear()
+                notifications = await sync_to_async(UserNotification.objects.bulk_create)([
+                    UserNotification(user=user, message=f'Нагрузочный тест {number} {uuid.uuid4().hex[:6]}')
+                    for user in users
+                ])
+                published = time.monotonic()
+                await sync_to_async(push.publish)(notifications)
+                await asyncio.wait_for(asyncio.gather(*(event.wait() for event in received)), 30)
+                latencies = [arrivals[i] - published for i in range(clients)]
+                rounds.append({
+                    'delivered': len(latencies),
+                    'p50_ms': _percentile(latencies, 0.5),
+                    'p95_ms': _percentile(latencies, 0.95),
+                    'max_ms': _percentile(latencies, 1),
+                })
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return {
+            'clients': clients,
+            'users': len(users),
+            'connect_s': round(connect_time, 2),
+            'threads': threads,
+            # ru_maxrss в килобайтах на Linux
+            'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'rounds': rounds,
+        }
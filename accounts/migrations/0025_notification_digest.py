@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0024_archivednotification_notif_read_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='notification_digest',
+            field=models.BooleanField(default=False, help_text='Напоминания, сработавшие одновременно, приходят одним уведомлением со списком событий', verbose_name='Объединять напоминания в одно уведомление'),
+        ),
+        migrations.AddField(
+            model_name='usernotification',
+            name='items',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
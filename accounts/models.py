@@ -18,6 +18,11 @@ class CustomUser(AbstractUser):
     phone = models.CharField('Телефон', max_length=20, blank=True, null=True)
     birth_date = models.DateField('Дата рождения', null=True, blank=True)
     bio = models.TextField('О себе', max_length=500, blank=True)
+    notification_digest = models.BooleanField(
+        'Объединять напоминания в одно уведомление',
+        default=False,
+        help_text='Напоминания, сработавшие одновременно, приходят одним уведомлением со списком событий',
+    )
 
     def clean(self):
         super().clean()
@@ -68,8 +73,29 @@ class PetInvite(models.Model):
 class UserNotification(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     message = models.TextField()
+    # Для сводки: [{'event_id', 'pet', 'title', 'time'}, ...] по каждому напоминанию
+    items = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Выпадающий список: keyset-пагинация по (created_at, id) в пределах пользователя
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_created_idx'),
+            # Очистка старых прочитанных (accounts.tasks.purge_read_notifications)
+            models.Index(fields=['created_at'], condition=models.Q(is_read=True), name='notif_read_created_idx'),
+        ]
+
     def __str__(self):
         return f"Уведомление для {self.user.username}"
+
+
+class ArchivedNotification(models.Model):
+    """Прочитанное уведомление, перенесённое из UserNotification по сроку хранения."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    message = models.TextField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Архивное уведомление для {self.user.username}"
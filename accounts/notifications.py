@@ -0,0 +1,158 @@
+"""
+Кэшированный счётчик непрочитанных уведомлений и короткий список последних.
+
+Для каждого пользователя в кэше default (Redis через django_redis) лежат
+два ключа: число непрочитанных и RECENT_LIMIT последних непрочитанных
+уведомлений. Страница читает оба одним get_many — один запрос к Redis,
+обращение к БД только при промахе. Счётчик увеличивается при создании
+уведомлений и уменьшается при прочтении, а задача
+reconcile_notification_counters периодически сверяет с БД счётчики, которые
+есть в кэше. Разойтись может только такой счётчик: отсутствующий ключ
+посчитается по БД при следующем обращении.
+
+Сам выпадающий список подгружается при открытии через page(): keyset-пагинация
+по (created_at, id), первая страница непрочитанных отдаётся из кэша.
+"""
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.urls import reverse
+
+from .models import UserNotification
+
+RECENT_LIMIT = 10
+MAX_PAGE_SIZE = 50
+
+
+def count_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def recent_key(user_id):
+    return f'notifications:recent:{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'NOTIFICATION_CACHE_TIMEOUT', 86400)
+
+
+def _load(user_id):
+    unread = UserNotification.objects.filter(user_id=user_id, is_read=False)
+    count = unread.count()
+    recent = list(
+        unread.order_by('-created_at', '-id').values('id', 'message', 'items', 'created_at', 'is_read')[:RECENT_LIMIT]
+    )
+    return count, recent
+
+
+def unread_summary(request):
+    """(число непрочитанных, последние непрочитанные); кэшируется и на время запроса."""
+    if not hasattr(request, '_unread_notifications'):
+        user_id = request.user.pk
+        cached = cache.get_many([count_key(user_id), recent_key(user_id)])
+        count = cached.get(count_key(user_id))
+        recent = cached.get(recent_key(user_id))
+        if count is None or recent is None:
+            count, recent = _load(user_id)
+            cache.set_many({count_key(user_id): count, recent_key(user_id): recent}, _timeout())
+        request._unread_notifications = (count, recent)
+    return request._unread_notifications
+
+
+def _add(user_id, delta):
+    try:
+        # Отрицательное значение возможно только при гонке; его исправит сверка
+        cache.incr(count_key(user_id), delta)
+    except ValueError:
+        pass  # ключа нет — счётчик посчитается при следующем обращении
+
+
+def notifications_created(notifications):
+    """Учитывает новые непрочитанные уведомления после коммита."""
+    per_user = Counter(n.user_id for n in notifications if not n.is_read)
+    if not per_user:
+        return
+
+    def apply():
+        for user_id, n in per_user.items():
+            _add(user_id, n)
+        cache.delete_many([recent_key(user_id) for user_id in per_user])
+
+    transaction.on_commit(apply)
+
+
+def notifications_read(user_id, count):
+    """Учитывает `count` прочитанных уведомлений пользователя после коммита."""
+    if not count:
+        return
+
+    def apply():
+        _add(user_id, -count)
+        cache.delete(recent_key(user_id))
+
+    transaction.on_commit(apply)
+
+
+def reconcile(user_ids):
+    """
+    Сверяет с БД закэшированные счётчики пользователей user_ids. Пользователи без
+    ключа в кэше пропускаются; переписываются (со сбросом списка последних) только
+    разошедшиеся счётчики. Возвращает число исправленных.
+    """
+    keys = {count_key(user_id): user_id for user_id in user_ids}
+    cached = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+    if not cached:
+        return 0
+    counts = dict.fromkeys(cached, 0)
+    counts.update(
+        UserNotification.objects.filter(user_id__in=list(cached), is_read=False)
+        .values('user_id')
+        .annotate(n=Count('id'))
+        .values_list('user_id', 'n')
+    )
+    drifted = {user_id: n for user_id, n in counts.items() if cached[user_id] != n}
+    if drifted:
+        cache.set_many({count_key(user_id): n for user_id, n in drifted.items()}, _timeout())
+        cache.delete_many([recent_key(user_id) for user_id in drifted])
+    return len(drifted)
+
+
+def encode_cursor(item):
+    return f"{item['created_at'].isoformat()}_{item['id']}"
+
+
+def decode_cursor(cursor):
+    """(created_at, id) из курсора или ValueError."""
+    created_at, _, pk = cursor.rpartition('_')
+    return datetime.fromisoformat(created_at), int(pk)
+
+
+def page(request, cursor=None, unread_only=True, limit=RECENT_LIMIT):
+    """
+    Страница уведомлений пользователя, от новых к старым: (элементы, курсор
+    следующей страницы или None). Курсор — (created_at, id) последнего элемента.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor is None and unread_only and limit <= RECENT_LIMIT:
+        count, recent = unread_summary(request)
+        items = recent[:limit]
+        has_more = count > len(items)
+    else:
+        queryset = UserNotification.objects.filter(user_id=request.user.pk)
+        if unread_only:
+            queryset = queryset.filter(is_read=False)
+        if cursor is not None:
+            created_at, pk = decode_cursor(cursor)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        items = list(
+            queryset.order_by('-created_at', '-id').values('id', 'message', 'items', 'created_at', 'is_read')[:limit + 1]
+        )
+        has_more = len(items) > limit
+        items = items[:limit]
+
+    next_cursor = encode_cursor(items[-1]) if has_more and items else None
+    return [dict(item, read_url=reverse('mark_notification_read', args=[item['id']])) for item in items], next_cursor
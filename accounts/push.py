@@ -0,0 +1,224 @@
+"""
+Доставка новых уведомлений в браузер через Server-Sent Events.
+
+dispatch_reminder_batch (send_reminders) после коммита публикует созданные
+уведомления в канал Redis CHANNEL — одно сообщение на пачку. Каждый ASGI-процесс
+держит одну подписку на канал (hub) и раскладывает сообщения по asyncio-очередям
+подключённых браузеров.
+
+Поток обслуживает не Django-представление, а ASGI-приложение sse_application,
+к которому config.asgi направляет путь accounts:notifications_stream. ASGIHandler
+Django 4.2 держит на каждый запрос отдельный поток для синхронных middleware
+(и своё подключение к БД) до конца ответа, а здесь сессия проверяется один раз
+в общем потоке, после чего соединение — только корутина в цикле событий.
+Поток живёт не дольше NOTIFICATION_STREAM_TIMEOUT секунд; EventSource сам
+переподключается и по Last-Event-ID получает пропущенное из БД.
+Включается настройкой NOTIFICATION_PUSH.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import connection, transaction
+from django.urls import reverse
+from django_redis import get_redis_connection
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'notifications:push'
+QUEUE_SIZE = 100
+RECONNECT_DELAY = 1
+
+
+def is_enabled():
+    return getattr(settings, 'NOTIFICATION_PUSH', False)
+
+
+def serialize(notification):
+    return {
+        'id': notification.id,
+        'message': notification.message,
+        'items': notification.items,
+        'created_at': notification.created_at.isoformat(),
+        'read_url': reverse('mark_notification_read', args=[notification.id]),
+    }
+
+
+def publish(notifications):
+    """Публикует уведомления одним сообщением {user_id: [уведомления]}."""
+    per_user = defaultdict(list)
+    for n in notifications:
+        per_user[str(n.user_id)].append(serialize(n))
+    if not per_user:
+        return
+    try:
+        get_redis_connection('default').publish(CHANNEL, json.dumps(per_user))
+    except RedisError as e:
+        # Не доставленное сейчас браузер получит из БД при переподключении
+        logger.error(f"[PUSH] Не удалось опубликовать уведомления: {e}")
+
+
+def publish_on_commit(notifications):
+    if not is_enabled():
+        return
+    notifications = list(notifications)
+    transaction.on_commit(lambda: publish(notifications))
+
+
+class Hub:
+    """Одна подписка на CHANNEL на процесс и очереди подключённых клиентов по пользователям."""
+
+    def __init__(self):
+        self._queues = defaultdict(set)
+        self._task = None
+        self.ready = None
+
+    def subscribe(self, user_id):
+        if self._task is None or self._task.done():
+            self.ready = asyncio.Event()
+            self._task = asyncio.ensure_future(self._listen())
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._queues[str(user_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self._queues.get(str(user_id))
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._queues[str(user_id)]
+
+    def subscriber_count(self):
+        return sum(len(queues) for queues in self._queues.values())
+
+    def dispatch(self, data):
+        for user_id, items in json.loads(data).items():
+            for queue in self._queues.get(user_id, ()):
+                try:
+                    queue.put_nowait(items)
+                except asyncio.QueueFull:
+                    # Клиент не успевает читать — догонит по Last-Event-ID
+                    pass
+
+    async def _listen(self):
+        while True:
+            client = aioredis.from_url(settings.CACHES['default']['LOCATION'])
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    self.ready.set()
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self.dispatch(message['data'])
+            except (RedisError, OSError) as e:
+                logger.error(f"[PUSH] Подписка на {CHANNEL} прервана: {e}")
+                self.ready.clear()
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                await client.aclose()
+
+
+hub = Hub()
+
+
+def format_event(item):
+    return f"id: {item['id']}\nevent: notification\ndata: {json.dumps(item, ensure_ascii=False)}\n\n"
+
+
+def _authenticate(session_key, last_event_id):
+    """(id пользователя, пропущенные уведомления новее last_event_id) или None для анонима."""
+    from .models import UserNotification
+
+    # Все проверки идут в одном общем потоке с одним подключением к БД;
+    # переоткрываем его только после ошибки, а не на каждый поток, как в запросе
+    if connection.errors_occurred and not connection.is_usable():
+        connection.close()
+    session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = get_user(SimpleNamespace(session=session))
+    if not user.is_authenticated:
+        return None
+    try:
+        last_id = int(last_event_id)
+    except (TypeError, ValueError):
+        return user.pk, []
+    missed = UserNotification.objects.filter(user=user, is_read=False, id__gt=last_id).order_by('id')[:QUEUE_SIZE]
+    return user.pk, [serialize(n) for n in missed]
+
+
+async def _empty_response(send, status):
+    await send({'type': 'http.response.start', 'status': status, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def sse_application(scope, receive, send):
+    """ASGI-приложение потока уведомлений текущего пользователя."""
+    if not is_enabled():
+        # 204 говорит EventSource больше не переподключаться
+        return await _empty_response(send, 204)
+    headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+    cookie = SimpleCookie(headers.get('cookie', '')).get(settings.SESSION_COOKIE_NAME)
+    state = await sync_to_async(_authenticate)(cookie and cookie.value, headers.get('last-event-id'))
+    if state is None:
+        return await _empty_response(send, 401)
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            # Не буферизовать поток в nginx
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+
+    async def pump():
+        async for chunk in stream(*state):
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(_wait_disconnect(receive))]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def stream(user_id, missed=()):
+    """Поток SSE для пользователя: сначала пропущенные уведомления, затем новые."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.NOTIFICATION_STREAM_TIMEOUT
+    queue = hub.subscribe(user_id)
+    try:
+        yield 'retry: 5000\n\n'
+        for item in missed:
+            yield format_event(item)
+        while True:
+            timeout = min(settings.NOTIFICATION_STREAM_KEEPALIVE, deadline - loop.time())
+            if timeout <= 0:
+                break
+            try:
+                items = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            for item in items:
+                yield format_event(item)
+    finally:
+        hub.unsubscribe(user_id, queue)
@@ -0,0 +1,68 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import notifications
+from .models import ArchivedNotification, CustomUser, UserNotification
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_CHUNK_SIZE = 1000
+
+
+@shared_task
+def reconcile_notification_counters():
+    """
+    Сверяет с БД кэшированные счётчики непрочитанных уведомлений активных
+    пользователей. Из кэша читаются ключи пачками, пишутся только разошедшиеся
+    счётчики; у остальных ключ просто истекает по таймауту.
+    """
+    user_ids = CustomUser.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True)
+    total = 0
+    chunk = []
+    for user_id in user_ids.iterator(chunk_size=RECONCILE_CHUNK_SIZE):
+        chunk.append(user_id)
+        if len(chunk) >= RECONCILE_CHUNK_SIZE:
+            total += notifications.reconcile(chunk)
+            chunk = []
+    if chunk:
+        total += notifications.reconcile(chunk)
+    logger.info(f"[NOTIFY] Исправлено счётчиков уведомлений: {total}")
+    return total
+
+
+@shared_task
+def purge_read_notifications():
+    """
+    Убирает из UserNotification прочитанные уведомления старше
+    NOTIFICATION_RETENTION_DAYS: переносит в ArchivedNotification или удаляет
+    (NOTIFICATION_RETENTION_MODE). Каждая пачка — отдельная короткая транзакция.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    archive = settings.NOTIFICATION_RETENTION_MODE == 'archive'
+    batch_size = settings.NOTIFICATION_RETENTION_BATCH_SIZE
+    expired = UserNotification.objects.filter(is_read=True, created_at__lt=cutoff).order_by('created_at')
+
+    total = 0
+    while True:
+        with transaction.atomic():
+            batch = list(expired.values('id', 'user_id', 'message', 'created_at')[:batch_size])
+            if not batch:
+                break
+            if archive:
+                ArchivedNotification.objects.bulk_create([
+                    ArchivedNotification(user_id=n['user_id'], message=n['message'], created_at=n['created_at'])
+                    for n in batch
+                ])
+            UserNotification.objects.filter(id__in=[n['id'] for n in batch]).delete()
+        total += len(batch)
+        if len(batch) < batch_size:
+            break
+
+    action = 'Архивировано' if archive else 'Удалено'
+    logger.info(f"[NOTIFY] {action} прочитанных уведомлений: {total}")
+    return total
@@ -1,3 +1,117 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import notifications, tasks
+from .models import ArchivedNotification, CustomUser, UserNotification
+
+
+def make_user(name):
+    return CustomUser.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+
+
+def notify(user, n, is_read=False):
+    UserNotification.objects.bulk_create([
+        UserNotification(user=user, message=f'Уведомление {i}', is_read=is_read) for i in range(n)
+    ])
+
+
+class ReconcileCountersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_only_cached_drifted_counters_are_rewritten(self):
+        exact, drifted, uncached = make_user('exact'), make_user('drifted'), make_user('uncached')
+        for user in (exact, drifted, uncached):
+            notify(user, 2)
+        cache.set_many({
+            notifications.count_key(exact.pk): 2, notifications.recent_key(exact.pk): ['список'],
+            notifications.count_key(drifted.pk): 7, notifications.recent_key(drifted.pk): ['список'],
+        })
+
+        self.assertEqual(tasks.reconcile_notification_counters(), 1)
+
+        self.assertEqual(cache.get(notifications.count_key(drifted.pk)), 2)
+        self.assertIsNone(cache.get(notifications.recent_key(drifted.pk)))
+        # Верный счётчик и его список не переписываются, отсутствующий ключ не создаётся
+        self.assertEqual(cache.get(notifications.recent_key(exact.pk)), ['список'])
+        self.assertIsNone(cache.get(notifications.count_key(uncached.pk)))
+
+
+@override_settings(NOTIFICATION_RETENTION_DAYS=90, NOTIFICATION_RETENTION_BATCH_SIZE=2)
+class PurgeReadNotificationsTests(TestCase):
+    def setUp(self):
+        user = make_user('reader')
+        old = timezone.now() - timedelta(days=100)
+        # Ровно две полные пачки старых прочитанных: цикл должен завершиться на пустой третьей
+        notify(user, 4, is_read=True)
+        UserNotification.objects.update(created_at=old)
+        notify(user, 1)
+        notify(user, 1, is_read=True)
+        self.old_unread = UserNotification.objects.filter(is_read=False).get()
+        UserNotification.objects.filter(pk=self.old_unread.pk).update(created_at=old)
+        self.recent_read = UserNotification.objects.filter(is_read=True).order_by('-created_at').first()
+        self.expired = list(
+            UserNotification.objects.filter(is_read=True, created_at=old).values_list('message', 'created_at')
+        )
+
+    def assert_untouched(self):
+        self.assertEqual(
+            set(UserNotification.objects.values_list('pk', flat=True)),
+            {self.old_unread.pk, self.recent_read.pk},
+        )
+
+    @override_settings(NOTIFICATION_RETENTION_MODE='archive')
+    def test_archive_mode(self):
+        self.assertEqual(tasks.purge_read_notifications(), 4)
+
+        self.assert_untouched()
+        self.assertCountEqual(ArchivedNotification.objects.values_list('message', 'created_at'), self.expired)
+
+    @override_settings(NOTIFICATION_RETENTION_MODE='delete')
+    def test_delete_mode(self):
+        self.assertEqual(tasks.purge_read_notifications(), 4)
+
+        self.assert_untouched()
+        self.assertFalse(ArchivedNotification.objects.exists())
+
+
+class MarkNotificationsReadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = make_user('reader')
+        self.client.force_login(self.user)
+        notify(self.user, 3)
+        notify(self.user, 1, is_read=True)
+        notify(make_user('stranger'), 1)
+        cache.set(notifications.count_key(self.user.pk), 3)
+
+    def post(self, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('mark_notifications_read'), data or {})
+
+    def test_counter_drops_by_updated_rows(self):
+        unread = list(UserNotification.objects.filter(user=self.user, is_read=False).values_list('pk', flat=True))
+        read = UserNotification.objects.get(user=self.user, is_read=True).pk
+        stranger = UserNotification.objects.exclude(user=self.user).get().pk
+
+        # Уже прочитанное и чужое не считаются
+        self.post({'ids': [unread[0], read, stranger]})
+        self.assertEqual(cache.get(notifications.count_key(self.user.pk)), 2)
+        self.assertFalse(UserNotification.objects.get(pk=stranger).is_read)
+
+        self.post()
+        self.assertEqual(cache.get(notifications.count_key(self.user.pk)), 0)
+        self.assertFalse(UserNotification.objects.filter(user=self.user, is_read=False).exists())
+
+    def test_non_integer_ids(self):
+        response = self.post({'ids': ['1', 'abc']})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UserNotification.objects.filter(is_read=False).count(), 4)
+        self.assertEqual(cache.get(notifications.count_key(self.user.pk)), 3)
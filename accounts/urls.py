@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import SignupPageView, profile, invite_owner, accept_invite, mark_notification_read, edit_profile
+from .views import SignupPageView, profile, invite_owner, accept_invite, mark_notification_read, mark_notifications_read, edit_profile, notifications_list, notifications_stream
 from django.conf.urls.static import static
 from django.conf import settings
 
@@ -9,6 +9,9 @@ urlpatterns = [
     path('profile/edit/', edit_profile, name='edit_profile'),
     path('invite/<uuid:pet_id>/', invite_owner, name='invite_owner'),
     path('accept/<uuid:token>/', accept_invite, name='accept_invite'),
+    path('notifications/', notifications_list, name='notifications'),
+    path('notifications/stream/', notifications_stream, name='notifications_stream'),
+    path('notifications/read/', mark_notifications_read, name='mark_notifications_read'),
     path('notifications/read/<int:notification_id>/', mark_notification_read, name='mark_notification_read'),
 
 ]
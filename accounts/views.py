@@ -5,11 +5,13 @@ from .forms import CustomUserCreationForm, UserEditForm
 from pets.models import Pet
 from django.contrib.auth.decorators import login_required
 from .models import PetInvite
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
 from .models import UserNotification
+from .notifications import RECENT_LIMIT, notifications_read, page, unread_summary
 from django.views.decorators.http import require_POST
 from articles.models import SavedArticle
 from django.contrib import messages
+from calendarapp import ics
 
 class SignupPageView(generic.CreateView):
     form_class = CustomUserCreationForm
@@ -19,13 +21,13 @@ class SignupPageView(generic.CreateView):
 @login_required
 def profile(request):
     pets = Pet.objects.filter(owners=request.user)
-    notifications = request.user.usernotification_set.filter(is_read=False)
     saved_articles = SavedArticle.objects.filter(user=request.user).select_related('article')
+    ics_url = request.build_absolute_uri(reverse('calendarapp:ics', args=[ics.subscription_token(request.user)]))
 
     return render(request, 'accounts/profile.html', {
         'pets': pets,
-        'notifications': notifications,
         'saved_articles': saved_articles,
+        'ics_url': ics_url,
     })
 
 @login_required
@@ -87,11 +89,50 @@ def accept_invite(request, token):
     login_url = reverse('account_login')  
     return redirect(f"{login_url}?next={request.path}")
 
+@login_required
+def notifications_list(request):
+    """Уведомления для выпадающего списка (JSON), ?cursor= — следующая страница, ?status=all — и прочитанные."""
+    try:
+        items, next_cursor = page(
+            request,
+            cursor=request.GET.get('cursor') or None,
+            unread_only=request.GET.get('status', 'unread') != 'all',
+            limit=int(request.GET.get('limit') or RECENT_LIMIT),
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Неверные параметры страницы'}, status=400)
+    count, _ = unread_summary(request)
+    return JsonResponse({'items': items, 'next_cursor': next_cursor, 'unread_count': count})
+
+def notifications_stream(request):
+    """
+    Поток уведомлений (SSE) под ASGI перехватывает config.asgi до Django
+    (accounts.push.sse_application). Сюда запрос доходит только под WSGI,
+    где держать соединение некому: 204 говорит EventSource не переподключаться.
+    """
+    return HttpResponse(status=204)
+
+@login_required
+@require_POST
+def mark_notifications_read(request):
+    """Отмечает прочитанными выбранные (ids) или все уведомления одним UPDATE."""
+    unread = UserNotification.objects.filter(user=request.user, is_read=False)
+    ids = request.POST.getlist('ids')
+    if ids:
+        try:
+            unread = unread.filter(id__in=[int(pk) for pk in ids])
+        except ValueError:
+            return HttpResponseBadRequest('Неверный список уведомлений')
+    notifications_read(request.user.pk, unread.update(is_read=True))
+    return redirect(request.META.get('HTTP_REFERER', '/'))
+
 @login_required
 def mark_notification_read(request, notification_id):
     notif = get_object_or_404(UserNotification, pk=notification_id, user=request.user)
     if request.method == "POST":
-        notif.is_read = True
-        notif.save()
+        if not notif.is_read:
+            notif.is_read = True
+            notif.save()
+            notifications_read(request.user.pk, 1)
         return redirect(request.META.get('HTTP_REFERER', '/'))
     return redirect('/')
\ No newline at end of file
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from articles.models import Article
+
+CHUNK_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает HTML и описания статей, у которых изменился текст или версия отрисовки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Перерисовать все статьи')
+
+    def handle(self, *args, **options):
+        articles = Article.objects.only('id', 'content', 'content_hash').order_by('pk')
+        changed = []
+        total = 0
+        for article in articles.iterator(chunk_size=CHUNK_SIZE):
+            if article.render_content(force=options['force']):
+                changed.append(article)
+            if len(changed) >= CHUNK_SIZE:
+                total += Article.objects.bulk_update(changed, Article.RENDERED_FIELDS)
+                changed = []
+        if changed:
+            total += Article.objects.bulk_update(changed, Article.RENDERED_FIELDS)
+        self.stdout.write(self.style.SUCCESS(f'Перерисовано статей: {total}'))
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:33
+
+import hashlib
+
+import bleach
+import markdown
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# Отрисовка на момент этой миграции, без кэша: миграция не должна зависеть от
+# того, как потом изменятся настройки отрисовки в коде приложения.
+RENDER_VERSION = 1
+EXCERPT_WORDS = 30
+EXTENSIONS = ['fenced_code', 'codehilite']
+ALLOWED_TAGS = [
+    'a', 'abbr', 'acronym', 'b', 'blockquote', 'code',
+    'em', 'i', 'li', 'ol', 'strong', 'ul', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'p', 'br', 'pre', 'img',
+    'span'
+]
+ALLOWED_ATTRIBUTES = {
+    '*': ['class', 'style'],
+    'a': ['href', 'title'],
+    'img': ['src', 'alt', 'title'],
+}
+
+
+def render_markdown(text):
+    if not text:
+        return ''
+    html_content = markdown.markdown(text, extensions=EXTENSIONS)
+    return bleach.clean(html_content, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES)
+
+
+def make_excerpt(html):
+    stripped_text = strip_tags(html)
+    parts = stripped_text.split()
+    if len(parts) > EXCERPT_WORDS:
+        return ' '.join(parts[:EXCERPT_WORDS]) + '...'
+    return stripped_text
+
+
+def content_hash(text):
+    return hashlib.sha256(f'{RENDER_VERSION}:{text}'.encode()).hexdigest()
+
+
+def render_articles(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    articles = list(Article.objects.only('id', 'content'))
+    for article in articles:
+        article.content_html = render_markdown(article.content)
+        article.excerpt = make_excerpt(article.content_html)
+        article.content_hash = content_hash(article.content)
+    Article.objects.bulk_update(articles, ['content_html', 'excerpt', 'content_hash'], batch_size=200)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_alter_savedarticle_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_articles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION articles_article_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.content, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER articles_article_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, content ON articles_article
+    FOR EACH ROW EXECUTE PROCEDURE articles_article_search_vector_update();
+
+-- Заполняем вектор для уже существующих строк (триггер срабатывает на изменение title)
+UPDATE articles_article SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS articles_article_search_vector_update ON articles_article;
+DROP FUNCTION IF EXISTS articles_article_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_article_rendered_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_idx', fastupdate=False),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+    ]
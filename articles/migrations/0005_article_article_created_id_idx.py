@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-created_at', '-id'], name='article_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_saved(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    SavedArticle = apps.get_model('articles', 'SavedArticle')
+    saved = (
+        SavedArticle.objects.filter(article=OuterRef('pk')).order_by()
+        .values('article').annotate(count=Count('id')).values('count')
+    )
+    Article.objects.update(saved_count=Coalesce(Subquery(saved), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_article_article_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='saved_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_saved, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:12
+
+import hashlib
+import json
+
+from django.db import migrations
+
+# Хэш 0003 — sha256('<версия>:<текст>'). Общий сервис отрисовки (pages.rendering)
+# считает его с отпечатком настроек; HTML при этом тот же, поэтому статьям с
+# актуальной отрисовкой достаточно пересчитать хэш, а не перерисовывать их
+# при первом открытии. Настройки — на момент этой миграции.
+RENDER_VERSION = 1
+EXTENSIONS = ['fenced_code', 'codehilite']
+ALLOWED_TAGS = [
+    'a', 'abbr', 'acronym', 'b', 'blockquote', 'code',
+    'em', 'i', 'li', 'ol', 'strong', 'ul', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'p', 'br', 'pre', 'img',
+    'span'
+]
+ALLOWED_ATTRIBUTES = {
+    '*': ['class', 'style'],
+    'a': ['href', 'title'],
+    'img': ['src', 'alt', 'title'],
+}
+CONFIG_FINGERPRINT = hashlib.sha256(json.dumps(
+    [RENDER_VERSION, EXTENSIONS, ALLOWED_TAGS, ALLOWED_ATTRIBUTES], sort_keys=True,
+).encode()).hexdigest()[:16]
+
+
+def old_hash(text):
+    return hashlib.sha256(f'{RENDER_VERSION}:{text}'.encode()).hexdigest()
+
+
+def new_hash(text):
+    return hashlib.sha256(f'{CONFIG_FINGERPRINT}:{text}'.encode()).hexdigest()
+
+
+def rehash(apps, schema_editor, make, expected):
+    Article = apps.get_model('articles', 'Article')
+    changed = []
+    for article in Article.objects.only('id', 'content', 'content_hash').iterator(chunk_size=200):
+        if article.content_hash == expected(article.content):
+            article.content_hash = make(article.content)
+            changed.append(article)
+    Article.objects.bulk_update(changed, ['content_hash'], batch_size=200)
+
+
+def forwards(apps, schema_editor):
+    rehash(apps, schema_editor, new_hash, old_hash)
+
+
+def backwards(apps, schema_editor):
+    rehash(apps, schema_editor, old_hash, new_hash)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_article_saved_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -1,8 +1,11 @@
 # articles/models.py
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.db.models import Count
 import uuid
 
+from pages.rendering import content_hash, make_excerpt, render_markdown
+
 # Если CustomUser в отдельном приложении accounts:
 try:
     from accounts.models import CustomUser
@@ -18,11 +21,49 @@ class Article(models.Model):
     content = models.TextField()
     image = models.ImageField(upload_to='article_images/', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Заранее отрисованный текст (pages.rendering), пересчитывается при сохранении
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt = models.TextField(blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # Заполняется триггером БД из title и content (миграция 0004), см. pages.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Сколько пользователей сохранили статью; меняется только через F() в save_article/unsave_article,
+    # сверяется командой reconcile_counters
+    saved_count = models.PositiveIntegerField(default=0, editable=False)
+
+    RENDERED_FIELDS = ['content_html', 'excerpt', 'content_hash']
+    COUNTER_FIELDS = ['saved_count']
+
+    class Meta:
+        indexes = [
+            # Документы меняются редко: без fastupdate поиск не просматривает список отложенных записей
+            GinIndex(fields=['search_vector'], name='article_search_vector_idx', fastupdate=False),
+            # Ключ keyset-пагинации каталога (pages.pagination)
+            models.Index(fields=['-created_at', '-id'], name='article_created_id_idx'),
+        ]
+
+    def render_content(self, force=False):
+        """Пересчитывает HTML и описание, если текст изменился; True — если пересчитано."""
+        digest = content_hash(self.content)
+        if not force and digest == self.content_hash:
+            return False
+        self.content_html = render_markdown(self.content)
+        self.excerpt = make_excerpt(self.content_html)
+        self.content_hash = digest
+        return True
 
-    @property
-    def saved_by_count(self):
-        """Возвращает количество пользователей, добавивших статью в избранное."""
-        return self.savedarticle_set.count()
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding:
+            # Счётчики не перезаписываем устаревшим значением из экземпляра (например, из админки)
+            update_fields = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+            kwargs['update_fields'] = update_fields
+        if self.render_content() and update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.RENDERED_FIELDS)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -1,3 +1,35 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import CustomUser
+
+from .models import Article, SavedArticle
+
+
+class SavedCountTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='reader', email='reader@example.com', password='x')
+        self.client.force_login(self.user)
+        self.article = Article.objects.create(title='Прогулки', content='Гуляйте **дважды** в день.')
+
+    def saved_count(self):
+        return Article.objects.values_list('saved_count', flat=True).get(pk=self.article.pk)
+
+    def test_save_and_unsave_update_counter(self):
+        self.client.get(reverse('articles:save', args=[self.article.id]))
+        self.client.get(reverse('articles:save', args=[self.article.id]))
+        self.assertEqual(self.saved_count(), 1)
+
+        self.client.get(reverse('articles:unsave', args=[self.article.id]))
+        self.client.get(reverse('articles:unsave', args=[self.article.id]))
+        self.assertEqual(self.saved_count(), 0)
+
+    def test_unsave_with_lagging_counter_stays_at_zero(self):
+        # Сохранение создано в обход save_article — счётчик остался 0
+        SavedArticle.objects.create(user=self.user, article=self.article)
+
+        response = self.client.get(reverse('articles:unsave', args=[self.article.id]))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.saved_count(), 0)
+        self.assertFalse(SavedArticle.objects.exists())
@@ -1,57 +1,32 @@
 # articles/views.py
-import markdown
-import bleach
-from django.utils.html import strip_tags
 from django.utils.safestring import mark_safe
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.http import HttpResponseBadRequest
 from .models import Article, SavedArticle
-from django.db.models import Count, Avg
+from pages.pagination import keyset_page
+
+ARTICLE_ORDERING = ('-created_at', '-id')
 
-# Разрешённые теги и атрибуты для Bleach
-ALLOWED_TAGS = [
-    'a', 'abbr', 'acronym', 'b', 'blockquote', 'code',
-    'em', 'i', 'li', 'ol', 'strong', 'ul', 'h1', 'h2',
-    'h3', 'h4', 'h5', 'h6', 'p', 'br', 'pre', 'img',
-    'span'
-]
-ALLOWED_ATTRIBUTES = {
-    '*': ['class', 'style'],
-    'a': ['href', 'title'],
-    'img': ['src', 'alt', 'title'],
-}
 
 def article_list(request):
-    articles = Article.objects.annotate(saved_count=Count('savedarticle')).order_by('-created_at')
-    
-    processed_articles = []
-    for article in articles:
-        if article.content:
-            # Преобразование Markdown в HTML
-            html_content = markdown.markdown(article.content, extensions=['fenced_code', 'codehilite'])
-            # Очистка HTML с помощью Bleach
-            cleaned_html = bleach.clean(html_content, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES)
-            # Удаление HTML-тегов
-            stripped_text = strip_tags(cleaned_html)
-            # Сокращение до 30 слов
-            words = stripped_text.split()
-            if len(words) > 30:
-                truncated_text = ' '.join(words[:30]) + '...'
-            else:
-                truncated_text = stripped_text
-        else:
-            truncated_text = ''
-        
-        processed_articles.append({
-            'id': article.id,
-            'title': article.title,
-            'image': article.image.url if article.image else '',
-            'truncated_content': truncated_text,
-            'created_at': article.created_at,
-            'saved_count': article.saved_count,
-        })
-    
-    return render(request, 'articles/list.html', {'articles': processed_articles})
+    # Описание и число сохранений посчитаны заранее: ни текст, ни SavedArticle не читаются
+    cursor = request.GET.get('cursor')
+    try:
+        articles, next_cursor = keyset_page(
+            Article.objects.only('id', 'title', 'image', 'excerpt', 'created_at', 'saved_count'),
+            ARTICLE_ORDERING, cursor,
+        )
+    except ValueError:
+        return HttpResponseBadRequest('Неверный курсор')
+    return render(request, 'articles/list.html', {
+        'articles': articles,
+        'cursor': cursor,
+        'next_cursor': next_cursor,
+    })
 
 
 @login_required
@@ -59,13 +34,10 @@ def article_detail(request, article_id):
     article = get_object_or_404(Article, id=article_id)
     is_saved = SavedArticle.objects.filter(user=request.user, article=article).exists()
 
-    # Обработка содержимого статьи
-    if article.content:
-        html_content = markdown.markdown(article.content, extensions=['fenced_code', 'codehilite'])
-        cleaned_html = bleach.clean(html_content, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES)
-        processed_content = mark_safe(cleaned_html)
-    else:
-        processed_content = ''
+    # Текст мог измениться в обход save() (например, через update()) — дорисовываем
+    if article.render_content():
+        article.save(update_fields=Article.RENDERED_FIELDS)
+    processed_content = mark_safe(article.content_html)
 
     context = {
         'article': article,
@@ -78,12 +50,19 @@ def article_detail(request, article_id):
 @login_required
 def save_article(request, article_id):
     article = get_object_or_404(Article, id=article_id)
-    SavedArticle.objects.get_or_create(user=request.user, article=article)
+    with transaction.atomic():
+        _, created = SavedArticle.objects.get_or_create(user=request.user, article=article)
+        if created:
+            Article.objects.filter(pk=article.pk).update(saved_count=F('saved_count') + 1)
     return redirect('articles:detail', article_id=article.id)
 
 
 @login_required
 def unsave_article(request, article_id):
     article = get_object_or_404(Article, id=article_id)
-    SavedArticle.objects.filter(user=request.user, article=article).delete()
+    with transaction.atomic():
+        deleted, _ = SavedArticle.objects.filter(user=request.user, article=article).delete()
+        if deleted:
+            # Счётчик мог отстать (сохранения из админки или shell его не увеличивают): ниже нуля не уходим
+            Article.objects.filter(pk=article.pk).update(saved_count=Greatest(F('saved_count') - deleted, 0))
     return redirect('articles:detail', article_id=article.id)
\ No newline at end of file
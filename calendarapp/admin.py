@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Event, ReminderSettings
+from .models import Event, EventSeries, ReminderSettings, RolloverCheckpoint
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
@@ -8,7 +8,17 @@ class EventAdmin(admin.ModelAdmin):
     search_fields = ('title', 'note')
 
 
+@admin.register(EventSeries)
+class EventSeriesAdmin(admin.ModelAdmin):
+    list_display = ('title', 'pet', 'event_type', 'created_at')
+    search_fields = ('title',)
+
+
 @admin.register(ReminderSettings)
 class ReminderSettingsAdmin(admin.ModelAdmin):
-    list_display = ('event', 'remind_at', 'repeat', 'remind_date', 'last_reminded')
+    list_display = ('event', 'remind_at', 'repeat', 'remind_date', 'last_reminded', 'next_fire_at')
+
 
+@admin.register(RolloverCheckpoint)
+class RolloverCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('run_date', 'created', 'skipped', 'started_at', 'finished_at')
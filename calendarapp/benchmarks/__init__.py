@@ -0,0 +1,9 @@
+"""
+Нагрузочные замеры движка напоминаний.
+
+seed.py заполняет БД синтетическими владельцами, питомцами, событиями и
+напоминаниями, measure.py снимает метрики выполнения задачи, plans.py
+проверяет планы горячих запросов.
+Запуск: python manage.py benchmark_reminders --scale 100000,
+python manage.py check_query_plans
+"""
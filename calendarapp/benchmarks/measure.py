@@ -0,0 +1,69 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.db import connection
+
+from accounts.models import CustomUser, UserNotification
+from calendarapp.models import Event, ReminderSettings
+from pets.models import Pet
+
+# Таблицы, прирост строк в которых попадает в отчёт
+COUNTED_MODELS = (CustomUser, Pet, Event, ReminderSettings, UserNotification)
+
+
+class QueryStats:
+    """Считает запросы, отправленные в БД, и строки, изменённые UPDATE и DELETE."""
+
+    def __init__(self):
+        self.queries = 0
+        self.updated = 0
+        self.deleted = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        result = execute(sql, params, many, context)
+        statement = sql.lstrip()[:6].upper()
+        rowcount = max(context['cursor'].rowcount, 0)
+        if statement == 'UPDATE':
+            self.updated += rowcount
+        elif statement == 'DELETE':
+            self.deleted += rowcount
+        return result
+
+
+def row_counts(models=COUNTED_MODELS):
+    return {model._meta.db_table: model.objects.count() for model in models}
+
+
+@contextmanager
+def measure(models=COUNTED_MODELS):
+    """
+    Замеряет время, число запросов, изменённые строки и пик памяти блока.
+    Вставленные строки считаются по COUNT(*) до и после, а не по rowcount запросов:
+    SQL-движок продления пишет внутри SELECT create_next_year_yearly_events(), и
+    rowcount этих вставок клиенту не виден. Обновлённые и удалённые строки не
+    меняют COUNT(*), их считает rowcount запросов UPDATE и DELETE. Подсчёт не входит
+    ни во время, ни в число запросов.
+    """
+    stats = QueryStats()
+    report = {}
+    before = row_counts(models)
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(stats):
+            yield report
+    finally:
+        report['wall_time_s'] = round(time.perf_counter() - started, 4)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        after = row_counts(models)
+        rows = {table: after[table] - before[table] for table in before}
+        report['queries'] = stats.queries
+        report['rows_added'] = rows
+        report['rows_inserted'] = sum(delta for delta in rows.values() if delta > 0)
+        report['rows_updated'] = stats.updated
+        report['rows_deleted'] = stats.deleted
+        report['rows_written'] = report['rows_inserted'] + stats.updated + stats.deleted
+        report['peak_memory_kb'] = round(peak / 1024, 1)
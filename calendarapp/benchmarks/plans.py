@@ -0,0 +1,96 @@
+"""
+Проверка планов горячих запросов календаря.
+
+Для каждого запроса выполняется EXPLAIN (FORMAT JSON); запрос считается
+регрессией, если в плане есть последовательное сканирование одной из
+больших таблиц (события, напоминания). Мелкие справочные таблицы
+(питомцы, владельцы) сканировать целиком планировщику разрешено.
+"""
+import json
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from calendarapp import rollover
+from calendarapp.models import Event
+from calendarapp.tasks import due_reminders
+from pets.models import Pet
+
+WATCHED_TABLES = ('calendarapp_event', 'calendarapp_remindersettings')
+
+# Части SQL-функции create_next_year_yearly_events (sql/yearly_events_trigger.sql)
+ROLLOVER_PASSED_SQL = """
+    SELECT e1.id, e1.pet_id, e1.title, e1."date"
+    FROM calendarapp_event e1
+    WHERE e1.is_yearly = TRUE
+      AND e1.recurrence = ''
+      AND e1."date" < CURRENT_DATE
+"""
+ROLLOVER_FUTURE_SQL = """
+    SELECT e2.pet_id, e2.title, COUNT(*)
+    FROM calendarapp_event e2
+    WHERE e2.is_yearly = TRUE
+      AND e2."date" >= CURRENT_DATE
+    GROUP BY e2.pet_id, e2.title
+"""
+
+
+def hot_queries(pet, user):
+    """Горячие запросы в том виде, в каком их выполняют представления и задачи."""
+    today = timezone.localdate()
+    return {
+        'dashboard_events': Event.objects.filter(
+            pet__in=Pet.objects.filter(owners=user),
+            date__gte=today,
+            date__lte=today + timedelta(days=30),
+            is_done=False,
+        ).order_by('date', 'time'),
+        'calendar_feed': Event.objects.filter(
+            pet=pet, date__gte=today - timedelta(days=7), date__lte=today + timedelta(days=35),
+        ),
+        'birthday_series': Event.objects.filter(pet=pet, event_type='birthday', is_yearly=True),
+        'rollover_batch': rollover._series_events([pet.id]),
+        'rollover_passed_sql': ROLLOVER_PASSED_SQL,
+        'rollover_future_sql': ROLLOVER_FUTURE_SQL,
+        'due_reminders': due_reminders(timezone.now()),
+    }
+
+
+def explain(query):
+    if isinstance(query, str):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {query}')
+            plan = cursor.fetchone()[0]
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+    else:
+        plan = json.loads(query.explain(format='json'))
+    return plan[0]['Plan']
+
+
+def _nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _nodes(child)
+
+
+def seq_scans(plan):
+    """Таблицы из WATCHED_TABLES, которые план читает последовательным сканированием."""
+    return sorted({
+        node['Relation Name'] for node in _nodes(plan)
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in WATCHED_TABLES
+    })
+
+
+def check(pet, user):
+    """Возвращает {имя запроса: (узлы плана, таблицы с Seq Scan)}."""
+    report = {}
+    for name, query in hot_queries(pet, user).items():
+        plan = explain(query)
+        nodes = [
+            f"{node['Node Type']}" + (f" on {node['Relation Name']}" if node.get('Relation Name') else '')
+            + (f" using {node['Index Name']}" if node.get('Index Name') else '')
+            for node in _nodes(plan)
+        ]
+        report[name] = (nodes, seq_scans(plan))
+    return report
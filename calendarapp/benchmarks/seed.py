@@ -0,0 +1,133 @@
+import random
+import uuid
+from datetime import date, time, timedelta
+
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from calendarapp.models import Event, ReminderSettings, compute_next_fire_at
+from pets.models import Pet
+
+PREFIX = 'bench_'
+
+REMINDERS_PER_PET = 10
+PETS_PER_OWNER = 2
+
+# Доли типов напоминаний: ежегодные, еженедельные, разовые
+MIX = (('yearly', 0.2), ('weekly', 0.5), ('once', 0.3))
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _random_day(rnd, today):
+    return today + timedelta(days=rnd.randint(-180, 180))
+
+
+def seed(scale, due_ratio=0.05, chunk_size=5000, random_seed=42):
+    """
+    Создаёт `scale` напоминаний (и событий к ним) для синтетических питомцев и владельцев.
+    Доля `due_ratio` напоминаний срабатывает прямо сейчас, чтобы send_reminders было что отправлять.
+    Возвращает (описание набора для отчёта, id созданных владельцев и питомцев для cleanup()).
+    """
+    rnd = random.Random(random_seed)
+    now = timezone.localtime()
+    today = now.date()
+    now_time = now.time().replace(second=0, microsecond=0)
+    tag = uuid.uuid4().hex[:8]
+
+    n_pets = max(1, scale // REMINDERS_PER_PET)
+    n_owners = max(1, n_pets // PETS_PER_OWNER)
+
+    owners = [
+        CustomUser(username=f'{PREFIX}{tag}_{i}', email=f'{PREFIX}{tag}_{i}@example.com')
+        for i in range(n_owners)
+    ]
+    for chunk in _chunks(owners, chunk_size):
+        CustomUser.objects.bulk_create(chunk)
+
+    pets = [
+        Pet(name=f'{PREFIX}{tag}_{i}', birthday=date(2015 + i % 8, 1 + i % 12, 1 + i % 28))
+        for i in range(n_pets)
+    ]
+    for chunk in _chunks(pets, chunk_size):
+        Pet.objects.bulk_create(chunk)
+
+    Owners = Pet.owners.through
+    links = [Owners(pet_id=p.id, customuser_id=owners[i // PETS_PER_OWNER % n_owners].id)
+             for i, p in enumerate(pets)]
+    for chunk in _chunks(links, chunk_size):
+        Owners.objects.bulk_create(chunk)
+
+    kinds = [k for k, _ in MIX]
+    weights = [w for _, w in MIX]
+    counts = dict.fromkeys(kinds, 0)
+    events = []
+    reminders = []
+
+    def flush():
+        Event.objects.bulk_create(events)
+        ReminderSettings.objects.bulk_create(reminders)
+        events.clear()
+        reminders.clear()
+
+    for i in range(scale):
+        pet = pets[i % n_pets]
+        kind = rnd.choices(kinds, weights)[0]
+        counts[kind] += 1
+        due = rnd.random() < due_ratio
+        remind_at = now_time if due else time(rnd.randint(0, 23), rnd.choice((0, 15, 30, 45)))
+
+        if kind == 'yearly':
+            # Дни рождения — как в create_or_update_birthday_event, на 09:00
+            event_date = today if due else _random_day(rnd, today)
+            if not due:
+                remind_at = time(9, 0)
+            event = Event(pet=pet, title=f'Ежегодное {i}', event_type='birthday',
+                          date=event_date, is_yearly=True)
+            reminder = ReminderSettings(event=event, pet=pet, remind_at=remind_at,
+                                        repeat=True, repeat_every=365)
+        elif kind == 'weekly':
+            days = set(rnd.sample(range(7), rnd.randint(1, 3)))
+            if due:
+                days.add(today.weekday())
+            event = Event(pet=pet, title=f'Прогулка {i}', event_type='walk', date=today)
+            reminder = ReminderSettings(event=event, pet=pet, remind_at=remind_at,
+                                        repeat=True, repeat_days=[str(d) for d in sorted(days)])
+        else:
+            remind_date = today if due else today + timedelta(days=rnd.randint(-30, 30))
+            event = Event(pet=pet, title=f'Ветеринар {i}', event_type='vet', date=remind_date)
+            reminder = ReminderSettings(event=event, pet=pet, remind_at=remind_at,
+                                        remind_date=remind_date)
+
+        reminder.next_fire_at = compute_next_fire_at(reminder, event)
+        events.append(event)
+        reminders.append(reminder)
+        if len(events) >= chunk_size:
+            flush()
+    flush()
+
+    dataset = {
+        'tag': tag,
+        'owners': n_owners,
+        'pets': n_pets,
+        'reminders': scale,
+        'mix': counts,
+    }
+    created = {'owners': [o.id for o in owners], 'pets': [p.id for p in pets]}
+    return dataset, created
+
+
+def cleanup(created, chunk_size=5000):
+    """
+    Удаляет владельцев и питомцев, созданных seed() (по их id, а не по префиксу
+    имени, чтобы не задеть настоящие данные); события и напоминания — каскадно.
+    """
+    deleted = 0
+    for model, ids in ((Pet, created['pets']), (CustomUser, created['owners'])):
+        for chunk in _chunks(ids, chunk_size):
+            count, _ = model.objects.filter(id__in=chunk).delete()
+            deleted += count
+    return deleted
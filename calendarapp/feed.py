@@ -0,0 +1,104 @@
+"""
+JSON-лента событий календаря питомца за период.
+
+Календарь на странице питомца запрашивает только видимые месяцы. Ответ
+помечается ETag/Last-Modified по последнему изменению событий периода,
+поэтому повторный запрос неизменённого месяца получает 304.
+"""
+import hashlib
+from datetime import date, timedelta
+
+from django.db.models import Count, Max
+from django.urls import reverse
+
+from . import recurrence
+from .models import Event, ReminderSettings
+
+# Самый длинный период за один запрос (вид «месяц» с соседними неделями с большим запасом)
+MAX_WINDOW_DAYS = 400
+
+FEED_FIELDS = (
+    'id', 'pet', 'title', 'date', 'time', 'note', 'is_done', 'is_yearly',
+    'recurrence', 'original_event', 'reminder__remind_at',
+)
+
+
+def parse_window(start, end):
+    """
+    Период из параметров FullCalendar (ISO-строки, конец не включается).
+    Возвращает (start, end) с включённым концом или None, если период неверный.
+    """
+    try:
+        start = date.fromisoformat((start or '')[:10])
+        end = date.fromisoformat((end or '')[:10]) - timedelta(days=1)
+    except ValueError:
+        return None
+    if end < start or (end - start).days > MAX_WINDOW_DAYS:
+        return None
+    return start, end
+
+
+def window_queryset(pet, start, end):
+    events = Event.objects.filter(pet=pet)
+    if recurrence.lazy_mode():
+        return recurrence.window_filter(events, start, end)
+    return events.filter(date__gte=start, date__lte=end)
+
+
+def events_state(events, key):
+    """
+    ETag и время последнего изменения набора событий — одним агрегирующим запросом.
+    Число событий в ETag учитывает удаления, которые не меняют updated_at.
+    """
+    state = events.aggregate(changed=Max('updated_at'), total=Count('id'))
+    changed = state['changed']
+    key = f"{key}:{state['total']}:{changed.isoformat() if changed else ''}"
+    etag = hashlib.md5(key.encode()).hexdigest()
+    last_modified = int(changed.timestamp()) if changed else None
+    return etag, last_modified
+
+
+def feed_state(pet, start, end, events):
+    return events_state(events, f'{pet.id}:{start}:{end}')
+
+
+def _remind_at(event):
+    try:
+        reminder = event.reminder
+    except ReminderSettings.DoesNotExist:
+        return ''
+    return reminder.remind_at.strftime('%H:%M') if reminder.remind_at else ''
+
+
+def serialize_event(event):
+    occurrence_date = getattr(event, 'occurrence_date', None)
+    query = f'?date={occurrence_date:%Y-%m-%d}' if occurrence_date else ''
+    day = event.date.strftime('%Y-%m-%d')
+    return {
+        'title': f'{event.title} ✅' if event.is_done else event.title,
+        'start': day,
+        'end': day,
+        'className': 'done' if event.is_done else 'not-done',
+        'backgroundColor': 'rgb(128, 238, 114)' if event.is_done else '#ffffff',
+        'textColor': '#000000',
+        'borderColor': 'rgb(100, 200, 100)' if event.is_done else '#ddd',
+        'extendedProps': {
+            'id': str(event.id),
+            'time': event.time.strftime('%H:%M') if event.time else '',
+            'note': event.note or '',
+            'is_done': event.is_done,
+            'remind': _remind_at(event),
+            'is_yearly': event.is_yearly,
+            'edit_url': reverse('calendarapp:edit', args=[event.id]) + query,
+            'done_url': reverse('calendarapp:done', args=[event.id]) + query,
+            'delete_url': reverse('calendarapp:delete', args=[event.id]),
+        },
+    }
+
+
+def serialize(events, start, end):
+    """События периода в формате FullCalendar; ленивые серии разворачиваются во вхождения."""
+    events = events.select_related('reminder').only(*FEED_FIELDS).order_by('date', 'time')
+    if recurrence.lazy_mode():
+        events = recurrence.expand_sorted(events, start, end)
+    return [serialize_event(event) for event in events]
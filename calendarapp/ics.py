@@ -0,0 +1,236 @@
+"""
+Экспорт календаря в iCalendar (RFC 5545) для подписки из внешних приложений.
+
+Лента строится потоково: события читаются серверным курсором (iterator()),
+и каждое VEVENT отдаётся клиенту сразу, без сборки всего файла в памяти.
+Под ASGI синхронный итератор StreamingHttpResponse собрал бы в список целиком,
+поэтому там лента отдаётся асинхронным генератором (astream_calendar).
+Ежегодная серия выводится одним VEVENT с RRULE:FREQ=YEARLY от первого
+вхождения, её копии отдельно не выводятся, а исключения ленивой серии
+становятся переопределениями вхождений (RECURRENCE-ID).
+
+Внешние календари не умеют входить на сайт, поэтому доступ к ленте даёт
+подписанная ссылка (django.core.signing) с id пользователя и, для ленты
+одного питомца, id питомца.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.utils import timezone
+
+from . import feed
+from .models import Event, ReminderSettings
+
+SALT = 'calendarapp.ics'
+UID_DOMAIN = 'dog-app'
+ITERATOR_CHUNK_SIZE = 2000
+# Сколько кусков ленты читать за один переход в синхронный поток под ASGI
+ASYNC_BATCH_SIZE = 200
+
+ICS_FIELDS = (
+    'id', 'pet__name', 'title', 'date', 'time', 'duration_minutes', 'note',
+    'is_done', 'is_yearly', 'recurrence', 'series', 'updated_at',
+    'original_event__recurrence', 'original_event__time',
+    'reminder__remind_at', 'reminder__remind_date', 'reminder__repeat',
+)
+
+
+def subscription_token(user, pet=None):
+    return signing.dumps({'user': str(user.pk), 'pet': str(pet.pk) if pet else None}, salt=SALT)
+
+
+def read_token(token):
+    """Данные подписанной ссылки или None, если подпись неверна."""
+    try:
+        return signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        return None
+
+
+def subscription_events(data):
+    events = Event.objects.filter(pet__owners__id=data['user'])
+    if data.get('pet'):
+        events = events.filter(pet_id=data['pet'])
+    return events
+
+
+def escape_text(value):
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Строка контента, свёрнутая по 75 октетов (многобайтовые символы не разрываются)."""
+    parts = []
+    current = ''
+    size = 0
+    for char in line:
+        length = len(char.encode('utf-8'))
+        if size + length > 75:
+            parts.append(current)
+            current = ' '
+            size = 1
+        current += char
+        size += length
+    parts.append(current)
+    return '\r\n'.join(parts) + '\r\n'
+
+
+def format_utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def format_duration(delta):
+    seconds = int(delta.total_seconds())
+    sign = '-' if seconds < 0 else ''
+    days, seconds = divmod(abs(seconds), 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    result = f'{sign}P'
+    if days:
+        result += f'{days}D'
+    if hours or minutes or seconds or not days:
+        result += 'T'
+        if hours:
+            result += f'{hours}H'
+        if minutes:
+            result += f'{minutes}M'
+        if seconds or not (hours or minutes):
+            result += f'{seconds}S'
+    return result
+
+
+def _local(day, moment=None):
+    return timezone.make_aware(datetime.combine(day, moment or time()))
+
+
+def _alarm(event, start):
+    """
+    VALARM по тем же правилам, что и compute_next_fire_at: у ежегодных — в день
+    события, у разовых — в дату напоминания. Смещение задаётся относительно
+    начала, поэтому работает для каждого вхождения серии. Повторяющиеся по дням
+    недели напоминания в VALARM не выражаются и не выводятся.
+    """
+    try:
+        reminder = event.reminder
+    except ReminderSettings.DoesNotExist:
+        return []
+    if not reminder.remind_at:
+        return []
+    if event.is_yearly:
+        fire_at = _local(event.date, reminder.remind_at)
+    elif reminder.repeat or not reminder.remind_date:
+        return []
+    else:
+        fire_at = _local(reminder.remind_date, reminder.remind_at)
+    return [
+        'BEGIN:VALARM',
+        'ACTION:DISPLAY',
+        f'DESCRIPTION:{escape_text(event.title)}',
+        f'TRIGGER:{format_duration(fire_at - start)}',
+        'END:VALARM',
+    ]
+
+
+def _is_yearly(event):
+    return bool(event.is_yearly or event.recurrence)
+
+
+def _is_lazy_exception(event):
+    """Сохранённое вхождение ленивой серии — выводится как переопределение (RECURRENCE-ID)."""
+    return bool(event.series_id and event.original_event_id and event.original_event.recurrence)
+
+
+def _start(day, moment):
+    if moment:
+        start = _local(day, moment)
+        return start, f'DTSTART:{format_utc(start)}', format_utc(start)
+    return _local(day), f'DTSTART;VALUE=DATE:{day:%Y%m%d}', f'{day:%Y%m%d}'
+
+
+def event_lines(event, pet_name=True):
+    yearly = _is_yearly(event)
+    exception = not yearly and _is_lazy_exception(event)
+    uid = event.series_id if (yearly or exception) and event.series_id else event.id
+    title = f'{event.pet.name}: {event.title}' if pet_name else event.title
+    if event.is_done and not yearly:
+        title += ' ✅'
+
+    start, dtstart, _ = _start(event.date, event.time)
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}@{UID_DOMAIN}',
+        f'DTSTAMP:{format_utc(event.updated_at)}',
+        dtstart,
+    ]
+    if event.time:
+        if event.duration_minutes:
+            lines.append(f'DURATION:PT{event.duration_minutes}M')
+    else:
+        lines.append(f'DTEND;VALUE=DATE:{event.date + timedelta(days=1):%Y%m%d}')
+    if yearly:
+        lines.append('RRULE:FREQ=YEARLY')
+    elif exception:
+        # Идентификатор вхождения — его исходное начало по расписанию серии
+        _, _, original_start = _start(event.date, event.original_event.time)
+        value = '' if event.original_event.time else ';VALUE=DATE'
+        lines.append(f'RECURRENCE-ID{value}:{original_start}')
+    lines.append(f'SUMMARY:{escape_text(title)}')
+    if event.note:
+        lines.append(f'DESCRIPTION:{escape_text(event.note)}')
+    lines.extend(_alarm(event, start))
+    lines.append('END:VEVENT')
+    return lines
+
+
+def stream_calendar(events, name, pet_name=True):
+    """
+    Генератор кусков .ics. Ежегодная серия выводится при первом (самом раннем)
+    своём событии, остальные её копии пропускаются.
+    """
+    yield fold('BEGIN:VCALENDAR')
+    yield fold('VERSION:2.0')
+    yield fold('PRODID:-//dog_app//calendar//RU')
+    yield fold('CALSCALE:GREGORIAN')
+    yield fold(f'X-WR-CALNAME:{escape_text(name)}')
+
+    seen_series = set()
+    queryset = (
+        events.select_related('pet', 'reminder', 'original_event')
+        .only(*ICS_FIELDS)
+        .order_by('date', 'time')
+    )
+    for event in queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        if event.series_id and _is_yearly(event):
+            if event.series_id in seen_series:
+                continue
+            seen_series.add(event.series_id)
+        yield ''.join(fold(line) for line in event_lines(event, pet_name))
+
+    yield fold('END:VCALENDAR')
+
+
+async def astream_calendar(events, name, pet_name=True):
+    """
+    stream_calendar для ASGI. Куски читаются пачками в синхронном потоке запроса
+    (thread_sensitive), поэтому серверный курсор живёт на одном соединении.
+    """
+    chunks = stream_calendar(events, name, pet_name)
+    take = sync_to_async(lambda: list(islice(chunks, ASYNC_BATCH_SIZE)), thread_sensitive=True)
+    try:
+        while True:
+            batch = await take()
+            if not batch:
+                break
+            yield ''.join(batch)
+    finally:
+        # Клиент отключился раньше конца ленты — закрываем курсор
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def calendar_state(events, token):
+    return feed.events_state(events, f'ics:{token}')
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from calendarapp.benchmarks.measure import measure
+from calendarapp.benchmarks.seed import cleanup, seed
+from calendarapp.tasks import create_next_year_yearly_events, send_reminders
+
+TASKS = {
+    'send_reminders': send_reminders,
+    'create_next_year_yearly_events': create_next_year_yearly_events,
+}
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный замер задач напоминаний на синтетических данных (результат в JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, nargs='+', default=[10000],
+                            help='Число напоминаний, например: --scale 10000 100000 1000000')
+        parser.add_argument('--due-ratio', type=float, default=0.05,
+                            help='Доля напоминаний, срабатывающих во время замера')
+        parser.add_argument('--tasks', nargs='+', choices=sorted(TASKS), default=sorted(TASKS))
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--keep', action='store_true', help='Не удалять данные после замера')
+        parser.add_argument('--output', help='Сохранить отчёт в файл')
+
+    def handle(self, *args, **options):
+        # Шардированная отправка (chord) выполняется в этом же процессе
+        send_reminders.app.conf.task_always_eager = True
+
+        results = []
+        for scale in options['scale']:
+            with measure() as seed_report:
+                dataset, created = seed(scale, due_ratio=options['due_ratio'], chunk_size=options['chunk_size'])
+            run = {'scale': scale, 'dataset': dataset, 'seed': seed_report, 'tasks': {}}
+
+            try:
+                for name in options['tasks']:
+                    with measure() as report:
+                        TASKS[name].apply()
+                    run['tasks'][name] = report
+                    self.stderr.write(
+                        f'{scale}: {name} — {report["wall_time_s"]} с, {report["queries"]} запросов, '
+                        f'строк: {report["rows_written"]} (вставлено {report["rows_inserted"]}, '
+                        f'обновлено {report["rows_updated"]}, удалено {report["rows_deleted"]})'
+                    )
+            finally:
+                if not options['keep']:
+                    cleanup(created, chunk_size=options['chunk_size'])
+            results.append(run)
+
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from calendarapp.benchmarks.plans import check
+from calendarapp.benchmarks.seed import cleanup, seed
+from pets.models import Pet
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN горячих запросов календаря; ошибка, если план сканирует события или напоминания целиком'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=50000,
+                            help='Число синтетических напоминаний (и событий) для замера')
+        parser.add_argument('--due-ratio', type=float, default=0.0007,
+                            help='Доля напоминаний, срабатывающих сейчас (около минуты из суток)')
+        parser.add_argument('--no-seed', action='store_true',
+                            help='Проверять на уже имеющихся данных, ничего не создавая')
+        parser.add_argument('--keep', action='store_true', help='Не удалять данные после проверки')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Проверка планов рассчитана на PostgreSQL')
+
+        created = None
+        if not options['no_seed']:
+            _, created = seed(options['scale'], due_ratio=options['due_ratio'])
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE calendarapp_event, calendarapp_remindersettings, pets_pet')
+            pets = Pet.objects.filter(events__isnull=False, owners__isnull=False)
+            if created:
+                pets = pets.filter(id__in=created['pets'][:100])
+            pet = pets.first()
+            if pet is None:
+                raise CommandError('Нет питомцев с событиями для проверки')
+            report = check(pet, pet.owners.first())
+        finally:
+            if created and not options['keep']:
+                cleanup(created)
+
+        failed = []
+        for name, (nodes, scanned) in report.items():
+            status = self.style.ERROR('SEQ SCAN') if scanned else self.style.SUCCESS('OK')
+            self.stdout.write(f'{name}: {status}')
+            for node in nodes:
+                self.stdout.write(f'    {node}')
+            if scanned:
+                failed.append(f'{name} ({", ".join(scanned)})')
+
+        if failed:
+            raise CommandError(f'Последовательное сканирование в планах: {"; ".join(failed)}')
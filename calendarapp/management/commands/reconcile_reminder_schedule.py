@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from calendarapp.tasks import reconcile_reminder_schedule
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает расписание напоминаний в Redis из ReminderSettings'
+
+    def handle(self, *args, **options):
+        total = reconcile_reminder_schedule()
+        self.stdout.write(self.style.SUCCESS(f'В расписании {total} напоминаний'))
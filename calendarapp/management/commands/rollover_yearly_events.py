@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from calendarapp.rollover import run_rollover
+
+
+class Command(BaseCommand):
+    help = 'Продлевает ежегодные серии пачками с сохранением контрольной точки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.YEARLY_ROLLOVER_BATCH_SIZE)
+        parser.add_argument('--restart', action='store_true',
+                            help='Начать сегодняшний запуск заново, игнорируя контрольную точку')
+
+    def handle(self, *args, **options):
+        checkpoint = run_rollover(batch_size=options['batch_size'], restart=options['restart'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: {checkpoint.created}, пропущено: {checkpoint.skipped}'
+        ))
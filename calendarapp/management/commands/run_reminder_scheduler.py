@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from calendarapp import scheduler
+from calendarapp.tasks import dispatch_scheduled_reminders
+
+
+class Command(BaseCommand):
+    help = 'Цикл планировщика: забирает наступившие напоминания из Redis и ставит их на отправку'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=settings.REMINDER_SCHEDULER_INTERVAL,
+                            help='Пауза между проверками, в секундах')
+        parser.add_argument('--once', action='store_true', help='Выполнить одну проверку и выйти')
+
+    def handle(self, *args, **options):
+        if not scheduler.is_enabled():
+            # Сервис в docker-compose запускается всегда, а работает только в режиме redis
+            self.stdout.write(f'Планировщик выключен (REMINDER_SCHEDULER={settings.REMINDER_SCHEDULER})')
+            return
+
+        interval = options['interval']
+        batch_size = settings.REMINDER_BATCH_SIZE
+        self.stdout.write(f'Планировщик напоминаний запущен (интервал {interval} с)')
+
+        while True:
+            try:
+                self.dispatch_due(batch_size)
+            except RedisError as e:
+                self.stderr.write(f'Ошибка Redis: {e}')
+
+            if options['once']:
+                break
+            time.sleep(interval)
+
+    def dispatch_due(self, batch_size):
+        while True:
+            popped = scheduler.pop_due(timezone.now().timestamp(), limit=batch_size)
+            if not popped:
+                return
+            try:
+                dispatch_scheduled_reminders.delay(list(popped))
+            except Exception as e:
+                # Брокер недоступен: возвращаем напоминания, иначе они ждали бы ночной сверки
+                scheduler.restore(popped)
+                self.stderr.write(f'Не удалось поставить на отправку {len(popped)} напоминаний: {e}')
+                return
+            self.stdout.write(f'Поставлено на отправку: {len(popped)}')
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:57
+
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def compute_next_fire_at(reminder, event):
+    """
+    Копия calendarapp.models.compute_next_fire_at на момент миграции: дальнейшие
+    правки модели не должны менять уже применённый шаг данных.
+    """
+    if not reminder.remind_at or event.is_done:
+        return None
+
+    after = timezone.now() - timedelta(minutes=getattr(settings, 'REMINDER_WINDOW_MINUTES', 3))
+    start = timezone.localtime(after).date()
+
+    def at(day):
+        return timezone.make_aware(datetime.combine(day, reminder.remind_at))
+
+    def fits(day):
+        return day != reminder.last_reminded and at(day) >= after
+
+    # Ежегодные события срабатывают в день и месяц события
+    if event.is_yearly:
+        for year in range(start.year, start.year + 9):
+            try:
+                day = date(year, event.date.month, event.date.day)
+            except ValueError:
+                continue  # 29 февраля в невисокосный год
+            if fits(day):
+                return at(day)
+        return None
+
+    # Повторяющиеся — в выбранные дни недели
+    if reminder.repeat:
+        days = {int(x) for x in (reminder.repeat_days or [])}
+        if not days:
+            return None
+        for offset in range(15):
+            day = start + timedelta(days=offset)
+            if day.weekday() in days and fits(day):
+                return at(day)
+        return None
+
+    # Разовые — в дату напоминания
+    if reminder.remind_date and fits(reminder.remind_date):
+        return at(reminder.remind_date)
+    return None
+
+
+def fill_next_fire_at(apps, schema_editor):
+    ReminderSettings = apps.get_model('calendarapp', 'ReminderSettings')
+    reminders = ReminderSettings.objects.select_related('event').filter(
+        event__is_done=False,
+        remind_at__isnull=False,
+    )
+    batch = []
+    for r in reminders.iterator(chunk_size=2000):
+        r.next_fire_at = compute_next_fire_at(r, r.event)
+        batch.append(r)
+        if len(batch) >= 2000:
+            ReminderSettings.objects.bulk_update(batch, ['next_fire_at'])
+            batch = []
+    if batch:
+        ReminderSettings.objects.bulk_update(batch, ['next_fire_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendarapp', 'XXXX_add_is_event_passed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remindersettings',
+            name='next_fire_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_next_fire_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendarapp', '0010_event_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RolloverCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_date', models.DateField(unique=True)),
+                ('last_pet_id', models.UUIDField(blank=True, null=True)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Продление ежегодных событий',
+                'verbose_name_plural': 'Продления ежегодных событий',
+            },
+        ),
+    ]
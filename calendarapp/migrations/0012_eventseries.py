@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0004_pet_features'),
+        ('calendarapp', '0011_rollovercheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSeries',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('event_type', models.CharField(choices=[('walk', 'Прогулка'), ('vet', 'Ветеринар'), ('grooming', 'Груминг'), ('vaccine', 'Прививка'), ('pill', 'Приём таблетки'), ('birthday', 'День рождения')], max_length=20)),
+                ('time', models.TimeField(blank=True, null=True)),
+                ('duration_minutes', models.PositiveIntegerField(blank=True, null=True)),
+                ('note', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_series', to='pets.pet')),
+            ],
+            options={
+                'verbose_name': 'Серия событий',
+                'verbose_name_plural': 'Серии событий',
+            },
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='calendarapp.eventseries'),
+        ),
+    ]
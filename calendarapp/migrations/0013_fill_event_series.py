@@ -0,0 +1,49 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def fill_event_series(apps, schema_editor):
+    """
+    Ежегодные события группируются в серии по (питомец, название) — так же,
+    как их раньше находил delete_event. Остальные события, ссылающиеся на
+    событие серии через original_event (исключения ленивых серий), попадают
+    в ту же серию.
+    """
+    Event = apps.get_model('calendarapp', 'Event')
+    EventSeries = apps.get_model('calendarapp', 'EventSeries')
+
+    groups = defaultdict(list)
+    for event in Event.objects.filter(is_yearly=True, series__isnull=True).order_by('date').iterator():
+        groups[(event.pet_id, event.title)].append(event)
+
+    series_by_event = {}
+    for (pet_id, title), events in groups.items():
+        first = events[0]
+        series = EventSeries.objects.create(
+            pet_id=pet_id,
+            title=title,
+            event_type=first.event_type,
+            time=first.time,
+            duration_minutes=first.duration_minutes,
+            note=first.note,
+        )
+        Event.objects.filter(id__in=[e.id for e in events]).update(series=series)
+        for e in events:
+            series_by_event[e.id] = series.id
+
+    for event in Event.objects.filter(series__isnull=True, original_event__isnull=False).iterator():
+        series_id = series_by_event.get(event.original_event_id)
+        if series_id:
+            Event.objects.filter(id=event.id).update(series_id=series_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendarapp', '0012_eventseries'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_event_series, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendarapp', '0014_event_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['pet', 'date', 'is_done'], name='event_pet_date_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_yearly', True)), fields=['pet', 'event_type'], name='event_yearly_pet_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_yearly', True)), fields=['date'], name='event_yearly_date_idx'),
+        ),
+    ]
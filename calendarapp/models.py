@@ -1,5 +1,7 @@
 from django.utils import timezone
 import uuid
+from datetime import date, datetime, timedelta
+from django.conf import settings
 from django.db import models
 from pets.models import Pet
 
@@ -12,6 +14,30 @@ EVENT_TYPES = [
     ('birthday', 'День рождения'),
 ]
 
+RECURRENCE_CHOICES = [
+    ('', 'Нет'),
+    ('yearly', 'Ежегодно (разворачивается на лету)'),
+]
+
+class EventSeries(models.Model):
+    """Серия событий: общие для всех вхождений поля, чтобы менять их одним UPDATE."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='event_series')
+    title = models.CharField(max_length=200)
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    time = models.TimeField(null=True, blank=True)
+    duration_minutes = models.PositiveIntegerField(null=True, blank=True)
+    note = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Серия событий"
+        verbose_name_plural = "Серии событий"
+
+    def __str__(self):
+        return f"Серия {self.title} ({self.pet})"
+
+
 class Event(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='events')
@@ -31,11 +57,27 @@ class Event(models.Model):
         blank=True,
         related_name='recurring_events'
     )
+    series = models.ForeignKey(
+        EventSeries,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='events'
+    )
     is_event_passed = models.BooleanField(default=False, verbose_name="Событие прошло")
+    recurrence = models.CharField(
+        max_length=10,
+        choices=RECURRENCE_CHOICES,
+        blank=True,
+        default='',
+        verbose_name="Повторение серии",
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
 
     def save(self, *args, **kwargs):
         # При сохранении проверяем дату для ежегодных событий
-        if self.is_yearly:
+        # (у ленивой серии дата — первое вхождение, её не сдвигаем)
+        if self.is_yearly and not self.recurrence:
             if self.date < timezone.now().date():
                 self.date = timezone.now().replace(month=self.date.month, day=self.date.day)
                 self.is_event_passed = True
@@ -44,11 +86,74 @@ class Event(models.Model):
 
     class Meta:
         unique_together = ('pet', 'title', 'date')
+        indexes = [
+            # События питомцев за период: дашборд, лента календаря, .ics
+            models.Index(fields=['pet', 'date', 'is_done'], name='event_pet_date_done_idx'),
+            # Ежегодные события питомца по типу (серия дня рождения), пачки rollover.py
+            models.Index(
+                fields=['pet', 'event_type'], condition=models.Q(is_yearly=True),
+                name='event_yearly_pet_type_idx',
+            ),
+            # Прошедшие и будущие ежегодные события в SQL-функции продления
+            models.Index(fields=['date'], condition=models.Q(is_yearly=True), name='event_yearly_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.event_type}) — {self.date}"
 
 
+def reminder_window():
+    """Допуск по времени, в пределах которого напоминание считается своевременным."""
+    return timedelta(minutes=getattr(settings, 'REMINDER_WINDOW_MINUTES', 3))
+
+
+def compute_next_fire_at(reminder, event, after=None, skip_days=()):
+    """
+    Ближайший момент срабатывания напоминания не раньше `after`
+    (по умолчанию — текущее время минус окно допуска), кроме дней из skip_days.
+    Функция работает только с атрибутами, поэтому подходит и для миграций.
+    """
+    if not reminder.remind_at or event.is_done:
+        return None
+
+    if after is None:
+        after = timezone.now() - reminder_window()
+    start = timezone.localtime(after).date()
+
+    def at(day):
+        return timezone.make_aware(datetime.combine(day, reminder.remind_at))
+
+    def fits(day):
+        return day != reminder.last_reminded and day not in skip_days and at(day) >= after
+
+    # Ежегодные события срабатывают в день и месяц события
+    if event.is_yearly:
+        for year in range(start.year, start.year + 9):
+            try:
+                day = date(year, event.date.month, event.date.day)
+            except ValueError:
+                continue  # 29 февраля в невисокосный год
+            if fits(day):
+                return at(day)
+        return None
+
+    # Повторяющиеся — в выбранные дни недели
+    if reminder.repeat:
+        days = {int(x) for x in (reminder.repeat_days or [])}
+        if not days:
+            return None
+        for offset in range(15):
+            day = start + timedelta(days=offset)
+            if day.weekday() in days and fits(day):
+                return at(day)
+        return None
+
+    # Разовые — в дату напоминания
+    if reminder.remind_date and fits(reminder.remind_date):
+        return at(reminder.remind_date)
+    return None
+
+
 class ReminderSettings(models.Model):
     event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='reminder')
     pet = models.ForeignKey(Pet, on_delete=models.CASCADE, default=None)
@@ -59,9 +164,44 @@ class ReminderSettings(models.Model):
     repeat_every = models.PositiveIntegerField(default=1)
     remind_date = models.DateField(null=True, blank=True)
     last_reminded = models.DateField(null=True, blank=True)
+    next_fire_at = models.DateTimeField(null=True, blank=True, db_index=True, editable=False)
 
     def get_repeat_days(self):
         return [int(x) for x in (self.repeat_days or [])]
 
+    def compute_next_fire_at(self, after=None):
+        skip_days = ()
+        if self.event.recurrence:
+            # Выполненное вхождение ленивой серии хранится исключением — в его день не напоминаем
+            skip_days = set(
+                Event.objects.filter(original_event=self.event, is_done=True).values_list('date', flat=True)
+            )
+        return compute_next_fire_at(self, self.event, after, skip_days)
+
+    def save(self, *args, **kwargs):
+        # Пересчитываем время следующего срабатывания при каждом сохранении
+        self.next_fire_at = self.compute_next_fire_at()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'next_fire_at' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['next_fire_at']
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Напоминание для {self.event}"
+
+
+class RolloverCheckpoint(models.Model):
+    """Прогресс ежегодного продления серий: позволяет продолжить прерванный запуск."""
+    run_date = models.DateField(unique=True)
+    last_pet_id = models.UUIDField(null=True, blank=True)
+    created = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Продление ежегодных событий"
+        verbose_name_plural = "Продления ежегодных событий"
+
     def __str__(self):
-        return f"Напоминание для {self.event}"
\ No newline at end of file
+        return f"Продление за {self.run_date}: создано {self.created}, пропущено {self.skipped}"
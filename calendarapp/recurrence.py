@@ -0,0 +1,93 @@
+"""
+Ленивые ежегодные серии.
+
+В режиме YEARLY_EVENTS_MODE = 'lazy' ежегодное событие хранится одной строкой
+(recurrence='yearly', date — первое вхождение), а вхождения разворачиваются
+на лету за нужный период. В БД отдельно сохраняются только вхождения со своим
+состоянием (выполнено, заметка) — «исключения» с original_event = серия.
+"""
+import copy
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Event
+
+YEARLY = 'yearly'
+
+
+def lazy_mode():
+    return getattr(settings, 'YEARLY_EVENTS_MODE', 'materialized') == 'lazy'
+
+
+def window_filter(queryset, start, end):
+    """Обычные события в периоде плюс серии, которые могли начаться до его конца."""
+    return queryset.filter(
+        Q(date__gte=start, date__lte=end) | Q(recurrence=YEARLY, date__lte=end)
+    )
+
+
+def occurrence_dates(series, start, end):
+    """Даты вхождений серии в периоде [start, end]; 29 февраля — только в високосные годы."""
+    first = max(start.year, series.date.year)
+    for year in range(first, end.year + 1):
+        try:
+            day = date(year, series.date.month, series.date.day)
+        except ValueError:
+            continue
+        if start <= day <= end and day >= series.date:
+            yield day
+
+
+def make_occurrence(series, day):
+    """Несохраняемое вхождение серии: копия строки серии с датой вхождения."""
+    occurrence = copy.copy(series)
+    occurrence.date = day
+    occurrence.occurrence_date = day
+    return occurrence
+
+
+def expand(events, start, end):
+    """
+    Генератор событий периода: обычные строки как есть, серии — развёрнутые
+    во вхождения, кроме дат, для которых уже сохранено исключение.
+    """
+    events = list(events)
+    series_ids = {e.id for e in events if e.recurrence == YEARLY}
+    overridden = {(e.original_event_id, e.date) for e in events if e.original_event_id in series_ids}
+
+    for e in events:
+        if e.recurrence == YEARLY:
+            for day in occurrence_dates(e, start, end):
+                if (e.id, day) not in overridden:
+                    yield make_occurrence(e, day)
+        elif start <= e.date <= end:
+            yield e
+
+
+def expand_sorted(events, start, end):
+    return sorted(expand(events, start, end), key=lambda e: (e.date, e.time is None, e.time))
+
+
+def materialize_occurrence(series, day):
+    """
+    Сохраняет вхождение серии как исключение (или возвращает уже сохранённое).
+    Если в этот день у питомца есть другое событие с тем же названием,
+    исключение не создать — IntegrityError.
+    """
+    exception, _ = Event.objects.get_or_create(
+        pet=series.pet,
+        title=series.title,
+        date=day,
+        original_event=series,
+        defaults={
+            'event_type': series.event_type,
+            'time': series.time,
+            'duration_minutes': series.duration_minutes,
+            'note': series.note,
+            'is_yearly': False,
+            'series_id': series.series_id,
+        },
+    )
+    return exception
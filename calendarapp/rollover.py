@@ -0,0 +1,166 @@
+"""
+Продление ежегодных серий на Python вместо PL/pgSQL-функции create_next_year_yearly_events.
+
+Питомцы с ежегодными событиями обходятся пачками по возрастанию id (keyset),
+каждая пачка — отдельная транзакция, после неё сохраняется RolloverCheckpoint.
+Прерванный запуск продолжается с последнего обработанного питомца.
+Включается настройкой YEARLY_ROLLOVER_ENGINE = 'python'.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import scheduler
+from .signals import events_changed
+from .models import Event, ReminderSettings, RolloverCheckpoint, compute_next_fire_at
+
+logger = logging.getLogger(__name__)
+
+# Сколько будущих вхождений должно быть у каждой серии
+FUTURE_OCCURRENCES = 3
+
+
+def _replace_year(day, year):
+    try:
+        return day.replace(year=year)
+    except ValueError:
+        return None  # 29 февраля в невисокосный год
+
+
+def _copy_reminder(reminder, event):
+    copy = ReminderSettings(
+        event=event,
+        pet_id=reminder.pet_id,
+        remind_at=reminder.remind_at,
+        repeat=reminder.repeat,
+        repeat_days=reminder.repeat_days,
+        repeat_every=reminder.repeat_every,
+        remind_date=_replace_year(reminder.remind_date, event.date.year) if reminder.remind_date else None,
+        last_reminded=reminder.last_reminded,
+    )
+    copy.next_fire_at = compute_next_fire_at(copy, event)
+    return copy
+
+
+def _series_events(pet_ids):
+    return (
+        Event.objects.filter(pet_id__in=pet_ids, is_yearly=True, recurrence='')
+        .select_related('reminder')
+        .order_by('date')
+    )
+
+
+def process_batch(pet_ids, today):
+    """Дополняет серии питомцев пачки до FUTURE_OCCURRENCES будущих вхождений."""
+    groups = defaultdict(list)
+    for event in _series_events(pet_ids):
+        groups[(event.pet_id, event.title)].append(event)
+
+    # Кандидаты на создание по каждой серии
+    planned = []
+    skipped = 0
+    for (pet_id, title), events in groups.items():
+        future = sum(1 for e in events if e.date >= today)
+        if future >= FUTURE_OCCURRENCES:
+            skipped += 1
+            continue
+
+        template = events[-1]
+        origin_id = template.original_event_id or template.id
+        year = template.date.year
+        while future < FUTURE_OCCURRENCES and year <= today.year + FUTURE_OCCURRENCES + 1:
+            year += 1
+            day = _replace_year(template.date, year)
+            if day is None or day < today:
+                continue
+            planned.append((template, origin_id, day))
+            future += 1
+
+    if not planned:
+        return 0, skipped, []
+
+    # Одним запросом проверяем конфликты с unique_together (pet, title, date)
+    existing = set(
+        Event.objects.filter(
+            pet_id__in={t.pet_id for t, _, _ in planned},
+            title__in={t.title for t, _, _ in planned},
+            date__in={d for _, _, d in planned},
+        ).values_list('pet_id', 'title', 'date')
+    )
+
+    new_events = []
+    new_reminders = []
+    for template, origin_id, day in planned:
+        if (template.pet_id, template.title, day) in existing:
+            skipped += 1
+            continue
+        event = Event(
+            pet_id=template.pet_id,
+            title=template.title,
+            event_type=template.event_type,
+            date=day,
+            time=template.time,
+            duration_minutes=template.duration_minutes,
+            note=template.note,
+            is_yearly=True,
+            is_done=False,
+            original_event_id=origin_id,
+            series_id=template.series_id,
+        )
+        new_events.append(event)
+        try:
+            reminder = template.reminder
+        except ReminderSettings.DoesNotExist:
+            continue
+        new_reminders.append(_copy_reminder(reminder, event))
+
+    Event.objects.bulk_create(new_events)
+    ReminderSettings.objects.bulk_create(new_reminders)
+    events_changed.send(sender=Event, pet_ids={e.pet_id for e in new_events})
+    return len(new_events), skipped, new_reminders
+
+
+def run_rollover(batch_size=500, today=None, restart=False):
+    """Запускает (или продолжает) продление за `today`; возвращает RolloverCheckpoint."""
+    today = today or timezone.localdate()
+    checkpoint, _ = RolloverCheckpoint.objects.get_or_create(run_date=today)
+    if restart:
+        checkpoint.last_pet_id = None
+        checkpoint.created = checkpoint.skipped = 0
+        checkpoint.finished_at = None
+        checkpoint.save()
+    elif checkpoint.finished_at:
+        logger.info(f"[ROLLOVER] Продление за {today} уже выполнено")
+        return checkpoint
+    elif checkpoint.last_pet_id:
+        logger.info(f"[ROLLOVER] Продолжаем с питомца {checkpoint.last_pet_id}")
+
+    pets = (
+        Event.objects.filter(is_yearly=True, recurrence='')
+        .order_by('pet_id')
+        .values_list('pet_id', flat=True)
+        .distinct()
+    )
+
+    while True:
+        page = pets.filter(pet_id__gt=checkpoint.last_pet_id) if checkpoint.last_pet_id else pets
+        pet_ids = list(page[:batch_size])
+        if not pet_ids:
+            break
+
+        with transaction.atomic():
+            created, skipped, new_reminders = process_batch(pet_ids, today)
+            checkpoint.last_pet_id = pet_ids[-1]
+            checkpoint.created += created
+            checkpoint.skipped += skipped
+            checkpoint.save(update_fields=['last_pet_id', 'created', 'skipped'])
+            scheduler.schedule_on_commit(new_reminders)
+
+        logger.info(f"[ROLLOVER] Пачка из {len(pet_ids)} питомцев: создано {created}, пропущено {skipped}")
+
+    checkpoint.finished_at = timezone.now()
+    checkpoint.save(update_fields=['finished_at'])
+    logger.info(f"[ROLLOVER] Готово: создано {checkpoint.created}, пропущено {checkpoint.skipped}")
+    return checkpoint
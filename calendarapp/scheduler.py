@@ -0,0 +1,186 @@
+"""
+Планировщик напоминаний на отсортированном множестве Redis.
+
+Каждое напоминание лежит в ZSET с весом = timestamp следующего срабатывания
+(ReminderSettings.next_fire_at). Цикл run_reminder_scheduler раз в секунду
+забирает только наступившие элементы и ставит задачу на их отправку.
+Включается настройкой REMINDER_SCHEDULER = 'redis'.
+
+Пока rebuild() собирает новое расписание во временном ключе, все изменения
+основного ключа дублируются в журнал (хэш id -> вес, пустая строка —
+удаление). Перед подменой ключа журнал применяется к новому расписанию,
+поэтому изменения, пришедшие во время пересборки, не теряются.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError, WatchError
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_KEY = 'reminders:schedule'
+REBUILD_KEY = f'{SCHEDULE_KEY}:rebuild'
+REBUILDING_KEY = f'{SCHEDULE_KEY}:rebuilding'
+JOURNAL_KEY = f'{SCHEDULE_KEY}:journal'
+# Метка пересборки истекает сама, если rebuild() упал, не сняв её
+REBUILD_TIMEOUT = 3600
+
+
+def is_enabled():
+    return getattr(settings, 'REMINDER_SCHEDULER', 'poll') == 'redis'
+
+
+def get_connection():
+    return get_redis_connection('default')
+
+
+def _write(conn, added=None, removed=(), nx=False):
+    """
+    Добавляет и удаляет элементы расписания, а во время пересборки — ещё и
+    записывает их в журнал. Метка проверяется до записи: если её ещё не было,
+    изменение уже сохранено в БД раньше, чем rebuild() начал её читать.
+    """
+    added = added or {}
+    rebuilding = conn.exists(REBUILDING_KEY)
+    pipe = conn.pipeline()
+    if added:
+        pipe.zadd(SCHEDULE_KEY, added, nx=nx)
+    if removed:
+        pipe.zrem(SCHEDULE_KEY, *removed)
+    if rebuilding:
+        journal = {member: '' for member in removed}
+        journal.update({member: repr(score) for member, score in added.items()})
+        pipe.hset(JOURNAL_KEY, mapping=journal)
+    pipe.execute()
+
+
+def schedule_many(reminders, conn=None):
+    """Синхронизирует позиции напоминаний в расписании с их next_fire_at."""
+    if not is_enabled():
+        return
+    reminders = list(reminders)
+    if not reminders:
+        return
+    added = {str(r.pk): r.next_fire_at.timestamp() for r in reminders if r.next_fire_at}
+    removed = [str(r.pk) for r in reminders if not r.next_fire_at]
+    try:
+        _write(conn or get_connection(), added, removed)
+    except RedisError as e:
+        # Расписание восстановится командой reconcile_reminder_schedule
+        logger.error(f"[SCHEDULER] Не удалось обновить расписание: {e}")
+
+
+def schedule_on_commit(reminders):
+    reminders = list(reminders)
+    transaction.on_commit(lambda: schedule_many(reminders))
+
+
+def unschedule(reminder_ids, conn=None):
+    if not is_enabled():
+        return
+    reminder_ids = [str(pk) for pk in reminder_ids]
+    if not reminder_ids:
+        return
+    try:
+        _write(conn or get_connection(), removed=reminder_ids)
+    except RedisError as e:
+        logger.error(f"[SCHEDULER] Не удалось удалить из расписания: {e}")
+
+
+def pop_due(until_ts, limit=1000, conn=None):
+    """
+    Забирает из расписания напоминания с весом <= until_ts: {id: вес}.
+    Элемент достаётся тому, чей ZREM его удалил, поэтому несколько
+    параллельных циклов не получат одно и то же напоминание.
+    """
+    conn = conn or get_connection()
+    members = conn.zrangebyscore(SCHEDULE_KEY, '-inf', until_ts, start=0, num=limit, withscores=True)
+    if not members:
+        return {}
+    rebuilding = conn.exists(REBUILDING_KEY)
+    pipe = conn.pipeline(transaction=False)
+    for m, _ in members:
+        pipe.zrem(SCHEDULE_KEY, m)
+    removed = pipe.execute()
+    popped = {m: score for (m, score), ok in zip(members, removed) if ok}
+    if rebuilding and popped:
+        conn.hset(JOURNAL_KEY, mapping={m: '' for m in popped})
+    return {int(m): score for m, score in popped.items()}
+
+
+def restore(popped, conn=None):
+    """
+    Возвращает в расписание забранные pop_due напоминания, если их не удалось
+    поставить на отправку. Уже перепланированные за это время не трогает.
+    """
+    if popped:
+        _write(conn or get_connection(), {str(pk): score for pk, score in popped.items()}, nx=True)
+
+
+def _apply_journal(conn):
+    """Переносит журнал в новое расписание и очищает его одной транзакцией."""
+    with conn.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(JOURNAL_KEY)
+                journal = pipe.hgetall(JOURNAL_KEY)
+                pipe.multi()
+                added = {m: float(score) for m, score in journal.items() if score}
+                removed = [m for m, score in journal.items() if not score]
+                if added:
+                    pipe.zadd(REBUILD_KEY, added)
+                if removed:
+                    pipe.zrem(REBUILD_KEY, *removed)
+                pipe.delete(JOURNAL_KEY)
+                pipe.execute()
+                return
+            except WatchError:
+                continue
+
+
+def _swap(conn):
+    """Подменяет расписание новым, если журнал пуст; False — в журнал успели дописать."""
+    with conn.pipeline() as pipe:
+        try:
+            pipe.watch(JOURNAL_KEY)
+            if pipe.exists(JOURNAL_KEY):
+                pipe.unwatch()
+                return False
+            has_items = pipe.exists(REBUILD_KEY)
+            pipe.multi()
+            if has_items:
+                pipe.rename(REBUILD_KEY, SCHEDULE_KEY)
+            else:
+                pipe.delete(SCHEDULE_KEY)
+            pipe.delete(REBUILDING_KEY)
+            pipe.execute()
+            return True
+        except WatchError:
+            return False
+
+
+def rebuild(queryset, conn=None, chunk_size=5000):
+    """Полностью пересобирает расписание из БД и атомарно подменяет ключ."""
+    conn = conn or get_connection()
+    conn.delete(REBUILD_KEY, JOURNAL_KEY)
+    # Метка ставится до чтения БД: всё, что изменится после, попадёт в журнал
+    conn.set(REBUILDING_KEY, 1, ex=REBUILD_TIMEOUT)
+    try:
+        total = 0
+        pipe = conn.pipeline(transaction=False)
+        for pk, next_fire_at in queryset.values_list('pk', 'next_fire_at').iterator(chunk_size=chunk_size):
+            pipe.zadd(REBUILD_KEY, {str(pk): next_fire_at.timestamp()})
+            total += 1
+            if total % chunk_size == 0:
+                pipe.execute()
+        pipe.execute()
+
+        while True:
+            _apply_journal(conn)
+            if _swap(conn):
+                return total
+    except BaseException:
+        conn.delete(REBUILDING_KEY, REBUILD_KEY, JOURNAL_KEY)
+        raise
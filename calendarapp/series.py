@@ -0,0 +1,117 @@
+"""
+Операции над серией событий целиком.
+
+Каждая операция выполняет постоянное число запросов независимо от числа
+вхождений: события серии меняются одним UPDATE, напоминания — одним
+bulk_update (и одним bulk_create для недостающих).
+"""
+from datetime import date
+
+from django.db.models import DateField, Func, IntegerField, Value
+from django.db.models.functions import Cast, ExtractYear
+from django.utils import timezone
+
+from . import scheduler
+from .signals import events_changed
+from .models import Event, EventSeries, ReminderSettings
+
+
+class MakeDate(Func):
+    function = 'MAKE_DATE'
+    output_field = DateField()
+
+
+def create_series(pet, title, event_type, time=None, duration_minutes=None, note=''):
+    return EventSeries.objects.create(
+        pet=pet,
+        title=title,
+        event_type=event_type,
+        time=time,
+        duration_minutes=duration_minutes or None,
+        note=note,
+    )
+
+
+def taken_dates(pet_id, title, candidates, exclude_ids=None):
+    """Какие из дат-кандидатов уже заняты событиями питомца с таким названием (один запрос)."""
+    queryset = Event.objects.filter(pet_id=pet_id, title=title, date__in=list(candidates))
+    if exclude_ids is not None:
+        queryset = queryset.exclude(id__in=exclude_ids)
+    return set(queryset.values_list('date', flat=True))
+
+
+def series_conflicts(series, title, month, day):
+    """
+    Даты, на которые нельзя перенести вхождения серии: уже занятые другими
+    событиями питомца с тем же названием или несуществующие (29 февраля).
+    """
+    candidates = []
+    invalid = []
+    for year in set(series.events.values_list('date__year', flat=True)):
+        try:
+            candidates.append(date(year, month, day))
+        except ValueError:
+            invalid.append(f'{year}-{month:02d}-{day:02d}')
+    taken = taken_dates(series.pet_id, title, candidates, exclude_ids=series.events.values('id'))
+    return invalid + [d.strftime('%Y-%m-%d') for d in sorted(taken)]
+
+
+def update_series(series, month=None, day=None, **fields):
+    """
+    Меняет поля всех событий серии одним UPDATE. Если переданы month/day,
+    каждое вхождение переносится на этот день своего года.
+    """
+    updates = dict(fields, updated_at=timezone.now())
+    if month and day:
+        updates['date'] = MakeDate(Cast(ExtractYear('date'), IntegerField()), Value(month), Value(day))
+    if fields.get('is_yearly') is False:
+        updates['recurrence'] = ''
+    Event.objects.filter(series=series).update(**updates)
+    if fields.get('is_yearly'):
+        # Исключения ленивой серии остаются обычными событиями
+        Event.objects.filter(series=series, original_event__recurrence='yearly').update(
+            is_yearly=False, updated_at=timezone.now()
+        )
+
+    series_fields = [f for f in ('title', 'event_type', 'time', 'duration_minutes', 'note') if f in fields]
+    for name in series_fields:
+        setattr(series, name, fields[name])
+    if series_fields:
+        series.save(update_fields=series_fields)
+    events_changed.send(sender=EventSeries, pet_ids=[series.pet_id])
+
+
+def update_series_reminders(series, remind_at, repeat, repeat_days, repeat_every, remind_date=None):
+    """Создаёт или обновляет напоминания у всех вхождений серии."""
+    to_create = []
+    to_update = []
+    for event in series.events.select_related('reminder'):
+        try:
+            rs = event.reminder
+            to_update.append(rs)
+        except ReminderSettings.DoesNotExist:
+            rs = ReminderSettings(event=event, pet_id=event.pet_id)
+            to_create.append(rs)
+
+        rs.event = event
+        rs.remind_at = remind_at
+        rs.repeat = repeat
+        rs.repeat_days = repeat_days
+        rs.repeat_every = repeat_every
+        if remind_date and not repeat:
+            rs.remind_date = date(event.date.year, remind_date.month, remind_date.day)
+        else:
+            rs.remind_date = None
+        rs.next_fire_at = rs.compute_next_fire_at()
+
+    ReminderSettings.objects.bulk_create(to_create)
+    ReminderSettings.objects.bulk_update(
+        to_update,
+        ['remind_at', 'repeat', 'repeat_days', 'repeat_every', 'remind_date', 'next_fire_at'],
+    )
+    scheduler.schedule_on_commit(to_create + to_update)
+
+
+def delete_series(series):
+    """Удаляет серию; события и их напоминания удаляются каскадно."""
+    series.delete()
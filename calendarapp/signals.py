@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import scheduler
+from .models import ReminderSettings
+
+# События питомцев изменены массово, в обход save()/delete() (update, bulk_*); аргумент pet_ids
+events_changed = Signal()
+
+
+@receiver(post_save, sender=ReminderSettings)
+def reminder_saved(sender, instance, **kwargs):
+    if scheduler.is_enabled():
+        scheduler.schedule_on_commit([instance])
+
+
+@receiver(post_delete, sender=ReminderSettings)
+def reminder_deleted(sender, instance, **kwargs):
+    if scheduler.is_enabled():
+        scheduler.unschedule([instance.pk])
@@ -1,3 +1,7 @@
+-- Текущая версия функции продления ежегодных событий.
+-- В БД её устанавливают миграции calendarapp (RunSQL в той же миграции, что меняет
+-- колонки calendarapp_event); initdb-копия нужна только новой БД до migrate.
+-- Меняя функцию, добавьте миграцию с новой версией.
 CREATE OR REPLACE FUNCTION create_next_year_yearly_events()
 RETURNS VOID AS $$
 DECLARE
@@ -14,9 +18,11 @@ BEGIN
             e1.time,
             e1.duration_minutes,
             e1.note,
+            e1.series_id,
             EXTRACT(YEAR FROM e1."date")::int AS event_year
         FROM calendarapp_event e1
         WHERE e1.is_yearly = TRUE
+          AND e1.recurrence = ''
           AND e1."date" < CURRENT_DATE
     ),
     future_yearly_events AS (
@@ -39,6 +45,7 @@ BEGIN
             pye.time,
             pye.duration_minutes,
             pye.note,
+            pye.series_id,
             pye.event_year,
             COALESCE(fye.future_events_count, 0) AS existing_future_count
         FROM passed_yearly_events pye
@@ -53,6 +60,7 @@ BEGIN
             etp.time,
             etp.duration_minutes,
             etp.note,
+            etp.series_id,
             etp.original_date + (i * INTERVAL '1 year') AS next_year_date
         FROM events_to_process etp
         CROSS JOIN generate_series(1, 3) AS i
@@ -71,7 +79,10 @@ BEGIN
             is_yearly,
             is_done,
             is_event_passed,
-            original_event_id
+            original_event_id,
+            recurrence,
+            series_id,
+            updated_at
         )
         SELECT
             gen_random_uuid(),
@@ -85,7 +96,10 @@ BEGIN
             TRUE,
             FALSE,
             FALSE,
-            original_event_id
+            original_event_id,
+            '',
+            series_id,
+            NOW()
         FROM required_future_events
         ON CONFLICT DO NOTHING
         RETURNING id, original_event_id, "date"
@@ -98,7 +112,8 @@ BEGIN
         repeat_days,
         repeat_every,
         remind_date,
-        last_reminded
+        last_reminded,
+        next_fire_at
     )
     SELECT 
         ie.id,
@@ -112,7 +127,8 @@ BEGIN
             COALESCE(EXTRACT(MONTH FROM r.remind_date), 1)::int,
             COALESCE(EXTRACT(DAY FROM r.remind_date), 1)::int
         ),
-        r.last_reminded
+        r.last_reminded,
+        r.next_fire_at
     FROM inserted_events ie
     JOIN passed_yearly_events pye ON ie.original_event_id = pye.original_event_id
     JOIN calendarapp_remindersettings r ON ie.original_event_id = r.event_id;
@@ -1,74 +1,230 @@
 import logging
-from datetime import date, datetime, timedelta
+from collections import defaultdict
+from datetime import datetime
 
-from celery import shared_task
+from celery import chord, shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.utils import timezone
 
-from .models import ReminderSettings
+from . import rollover, scheduler
+from .models import ReminderSettings, reminder_window
+from accounts import notifications as notification_cache
+from accounts import push
 from accounts.models import UserNotification
 
 logger = logging.getLogger(__name__)
 
-@shared_task
-def send_reminders():
-    now_dt = timezone.now()
-    today = now_dt.date()
-    now_time = now_dt.time()
-    weekday = today.weekday()
+def reminder_message(r):
+    return f"{r.pet.name}: {r.event.title} — сегодня в {r.remind_at.strftime('%H:%M')}"
 
-    reminders = ReminderSettings.objects.select_related('event', 'pet').filter(
-        event__is_done=False,
-    )
 
-    logger.info(f"[REMINDER] Найдено {len(reminders)} напоминаний")
+def reminder_item(r):
+    return {'event_id': str(r.event_id), 'pet': r.pet.name, 'title': r.event.title, 'time': r.remind_at.strftime('%H:%M')}
+
+
+def digest_message(items):
+    events = '; '.join(f"{item['pet']}: {item['title']} в {item['time']}" for item in items)
+    return f"Напоминания на сегодня ({len(items)}): {events}"
+
+
+def dispatch_reminder_batch(batch):
+    """
+    Отправляет пачку напоминаний: владельцы подгружаются одним запросом,
+    уведомления создаются одним bulk_create, а last_reminded/next_fire_at
+    обновляются одним UPDATE — всё в одной транзакции.
+
+    Перед отправкой строки захватываются через SELECT ... FOR UPDATE SKIP LOCKED,
+    и отправляются только те, чей next_fire_at не изменился с момента чтения.
+    Поэтому параллельные запуски beat/воркеров не создают дублей уведомлений.
+
+    Владельцы с включённой сводкой (notification_digest) получают одно
+    уведомление на все свои напоминания пачки со списком событий в items.
+    Возвращает список отправленных напоминаний и число уведомлений.
+    """
+    with transaction.atomic():
+        locked = dict(
+            ReminderSettings.objects.select_for_update(skip_locked=True)
+            .filter(id__in=[r.id for r in batch])
+            .values_list('id', 'next_fire_at')
+        )
+        claimed = [r for r in batch if r.id in locked and locked[r.id] == r.next_fire_at]
+        if not claimed:
+            return [], 0
+
+        prefetch_related_objects(claimed, 'pet__owners')
+
+        notifications = []
+        digests = defaultdict(list)
+        for r in claimed:
+            msg = reminder_message(r)
+            for user in r.pet.owners.all():
+                if user.notification_digest:
+                    digests[user.pk].append(r)
+                else:
+                    notifications.append(UserNotification(user=user, message=msg))
+            r.last_reminded = timezone.localtime(r.next_fire_at).date()
+            r.next_fire_at = r.compute_next_fire_at()
+
+        for user_id, reminders in digests.items():
+            if len(reminders) == 1:
+                notifications.append(UserNotification(user_id=user_id, message=reminder_message(reminders[0])))
+            else:
+                items = [reminder_item(r) for r in reminders]
+                notifications.append(UserNotification(user_id=user_id, message=digest_message(items), items=items))
+
+        UserNotification.objects.bulk_create(notifications, batch_size=len(notifications) or None)
+        notification_cache.notifications_created(notifications)
+        push.publish_on_commit(notifications)
+        ReminderSettings.objects.bulk_update(claimed, ['last_reminded', 'next_fire_at'], batch_size=len(claimed))
 
-    count = 0
+    if len(claimed) < len(batch):
+        logger.info(f"[NOTIFY] Пропущено {len(batch) - len(claimed)} напоминаний, уже захваченных другим обработчиком")
+    logger.info(f"[NOTIFY] Пачка: {len(claimed)} напоминаний, {len(notifications)} уведомлений")
+    return claimed, len(notifications)
+
+
+def process_reminders(reminders, now_dt):
+    """Отправляет наступившие напоминания из выборки, остальные переносит на следующий раз."""
+    window = reminder_window()
+    batch_size = settings.REMINDER_BATCH_SIZE
+
+    due = []
+    skipped = []
     for r in reminders:
-        logger.info(f"[REMINDER] Напоминание для события {r.event.title}")
-
-        if not r.remind_at:
-            logger.info(f"  Пропускаем напоминание для события {r.event.title} (нет времени напоминания)")
-            continue
-
-        event = r.event
-
-        # Для ежегодных событий проверяем только месяц и день события
-        if event.is_yearly:
-            if event.date.month != today.month or event.date.day != today.day:
-                logger.info(f"  Пропускаем напоминание для события {r.event.title} (не совпадает месяц/день)")
-                continue
-        # Для остальных напоминаний проверяем дату или день недели
-        elif not r.repeat and (not r.remind_date or r.remind_date != today):
-            logger.info(f"  Пропускаем напоминание для события {r.event.title} (не повторяется или не совпадает дата напоминания)")
-            continue
-        elif r.repeat and weekday not in r.get_repeat_days():
-            logger.info(f"  Пропускаем напоминание для события {r.event.title} (не повторяется или не совпадает день недели)")
-            continue
-
-        # Проверка, находится ли текущее время в 3-минутном окне от запланированного времени напоминания
-        target_dt = timezone.make_aware(datetime.combine(today, r.remind_at))
-
-        if not (timedelta(minutes=-3) <= (now_dt - target_dt) <= timedelta(minutes=3)):
-            logger.info(f"  Пропускаем напоминание для события {r.event.title} (вне 3-минутного окна)")
-            continue
+        fire_day = timezone.localtime(r.next_fire_at).date()
 
+        # Напоминание пропущено (например, воркер не работал) — просто переносим на следующий раз
+        if now_dt - r.next_fire_at > window:
+            logger.info(f"  Пропускаем напоминание для события {r.event.title} (вне {window.seconds // 60}-минутного окна)")
+            skipped.append(r)
         # Проверка, чтобы не напоминать несколько раз в один день
-        if r.last_reminded == today:
+        elif r.last_reminded == fire_day:
             logger.info(f"  Пропускаем напоминание для события {r.event.title} (уже напоминано сегодня)")
-            continue
+            skipped.append(r)
+        else:
+            due.append(r)
+
+    for r in skipped:
+        r.next_fire_at = r.compute_next_fire_at()
+    ReminderSettings.objects.bulk_update(skipped, ['next_fire_at'], batch_size=batch_size)
+
+    sent = []
+    notified = 0
+    for i in range(0, len(due), batch_size):
+        claimed, batch_notified = dispatch_reminder_batch(due[i:i + batch_size])
+        sent.extend(claimed)
+        notified += batch_notified
+    count = len(sent)
+
+    # В режиме Redis возвращаем напоминания в расписание с новым временем
+    scheduler.schedule_many(sent + skipped)
+
+    return count, notified
 
-        # Создание уведомления
-        for user in r.pet.owners.all():
-            msg = f"{r.pet.name}: {event.title} — сегодня в {r.remind_at.strftime('%H:%M')}"
-            UserNotification.objects.create(user=user, message=msg)
-            logger.info(f"[NOTIFY] В БД для {user.username}: {msg}")
 
-        # Обновляем поле last_reminded
-        r.last_reminded = today
-        r.save()
-        count += 1
+def due_reminders(now_dt):
+    # Берём только напоминания, время которых уже наступило (с учётом окна)
+    return ReminderSettings.objects.select_related('event', 'pet').filter(
+        event__is_done=False,
+        next_fire_at__lte=now_dt + reminder_window(),
+    ).order_by('next_fire_at')
+
+
+def shard_for(pet_id, shards):
+    # UUID питомца даёт стабильный номер шарда (в отличие от hash() строки)
+    return pet_id.int % shards
+
 
-    logger.info(f"[REMINDER] Всего отправлено: {count}")
+def reminder_stats(found, shards, count, notified):
+    """Итог отправки в одном формате для обычного режима, шардов и сводки chord."""
+    return {'found': found, 'shards': shards, 'count': count, 'notified': notified}
+
+
+@shared_task
+def send_reminders():
+    """
+    Отправляет наступившие напоминания. При REMINDER_SHARDS > 1 раскладывает их
+    по шардам и сразу возвращается: count и notified тогда None, итог в том же
+    формате вернёт summarize_reminder_shards.
+    """
+    now_dt = timezone.now()
+    shards = settings.REMINDER_SHARDS
+
+    if shards <= 1:
+        reminders = due_reminders(now_dt)
+        logger.info(f"[REMINDER] Найдено {len(reminders)} напоминаний")
+        count, notified = process_reminders(reminders, now_dt)
+        logger.info(f"[REMINDER] Всего отправлено: {count} (уведомлений: {notified})")
+        return reminder_stats(len(reminders), 1, count, notified)
+
+    # Раскладываем напоминания по шардам: все напоминания одного питомца
+    # попадают в один шард и обрабатываются одним воркером
+    ids_by_shard = defaultdict(list)
+    for pk, pet_id in due_reminders(now_dt).values_list('id', 'pet_id'):
+        ids_by_shard[shard_for(pet_id, shards)].append(pk)
+
+    found = sum(len(ids) for ids in ids_by_shard.values())
+    logger.info(f"[REMINDER] Найдено {found} напоминаний, шардов: {len(ids_by_shard)}")
+    if not ids_by_shard:
+        return reminder_stats(0, 0, 0, 0)
+
+    header = [
+        process_reminder_shard.s(ids, now_dt.isoformat())
+        for _, ids in sorted(ids_by_shard.items())
+    ]
+    chord(header)(summarize_reminder_shards.s())
+    return reminder_stats(found, len(header), None, None)
+
+
+@shared_task
+def process_reminder_shard(reminder_ids, now_iso):
+    now_dt = datetime.fromisoformat(now_iso)
+    reminders = list(due_reminders(now_dt).filter(id__in=reminder_ids))
+    count, notified = process_reminders(reminders, now_dt)
+    logger.info(f"[REMINDER] Шард: отправлено {count} (уведомлений: {notified})")
+    return reminder_stats(len(reminders), 1, count, notified)
+
+
+@shared_task
+def summarize_reminder_shards(results):
+    found = sum(r['found'] for r in results)
+    count = sum(r['count'] for r in results)
+    notified = sum(r['notified'] for r in results)
+    logger.info(f"[REMINDER] Всего отправлено: {count} (уведомлений: {notified}), шардов: {len(results)}")
+    return reminder_stats(found, len(results), count, notified)
+
+
+@shared_task
+def dispatch_scheduled_reminders(reminder_ids):
+    """Отправляет напоминания, которые цикл планировщика забрал из Redis."""
+    now_dt = timezone.now()
+    reminders = list(due_reminders(now_dt).filter(id__in=reminder_ids))
+
+    count, notified = process_reminders(reminders, now_dt)
+
+    # Напоминания, которые к этому моменту изменились или были выполнены,
+    # возвращаем в расписание по актуальному next_fire_at
+    handled = {r.id for r in reminders}
+    rest = [pk for pk in reminder_ids if pk not in handled]
+    if rest:
+        existing = list(ReminderSettings.objects.filter(id__in=rest).only('id', 'next_fire_at'))
+        scheduler.schedule_many(existing)
+        scheduler.unschedule(set(rest) - {r.id for r in existing})
+
+    logger.info(f"[SCHEDULER] Отправлено: {count} (уведомлений: {notified})")
+
+
+@shared_task
+def reconcile_reminder_schedule():
+    """Пересобирает расписание в Redis из ReminderSettings."""
+    total = scheduler.rebuild(ReminderSettings.objects.filter(
+        event__is_done=False,
+        next_fire_at__isnull=False,
+    ))
+    logger.info(f"[SCHEDULER] Расписание пересобрано: {total} напоминаний")
+    return total
 
 from django_redis import get_redis_connection
 
@@ -83,9 +239,32 @@ logger = logging.getLogger(__name__)
 def create_next_year_yearly_events():
     logger.info("Задача create_next_year_yearly_events запущена")
 
+    if settings.YEARLY_ROLLOVER_ENGINE == 'python':
+        checkpoint = rollover.run_rollover(batch_size=settings.YEARLY_ROLLOVER_BATCH_SIZE)
+        return {'created': checkpoint.created, 'skipped': checkpoint.skipped}
+
     try:
         with connection.cursor() as cursor:
             cursor.execute("SELECT create_next_year_yearly_events();")
         logger.info("Функция create_next_year_yearly_events выполнена успешно")
+        fill_missing_next_fire_at()
     except Exception as e:
-        logger.error(f"Ошибка в задаче create_next_year_yearly_events: {e}")
\ No newline at end of file
+        # Ошибка должна быть видна в Celery, иначе продление молча перестаёт работать
+        logger.error(f"Ошибка в задаче create_next_year_yearly_events: {e}")
+        raise
+
+def fill_missing_next_fire_at():
+    """Заполняет next_fire_at у напоминаний, созданных SQL-функцией в обход save()."""
+    reminders = ReminderSettings.objects.select_related('event').filter(
+        event__is_yearly=True,
+        event__is_done=False,
+        remind_at__isnull=False,
+        next_fire_at__isnull=True,
+    )
+    updated = []
+    for r in reminders:
+        r.next_fire_at = r.compute_next_fire_at()
+        updated.append(r)
+    ReminderSettings.objects.bulk_update(updated, ['next_fire_at'], batch_size=1000)
+    scheduler.schedule_many(updated)
+    logger.info(f"[REMINDER] Пересчитано next_fire_at: {len(updated)}")
@@ -1,3 +1,545 @@
-from django.test import TestCase
+import threading
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser, UserNotification
+from pets.models import Pet
+
+from . import ics, rollover, scheduler, series, tasks
+from .benchmarks.measure import measure
+from .models import Event, ReminderSettings
+
+
+def make_pet(name='Бобик', **owner_fields):
+    owner = CustomUser.objects.create_user(
+        username=f'owner_{name}', email=f'{name}@example.com', password='x', **owner_fields,
+    )
+    pet = Pet.objects.create(name=name, birthday=date(2020, 5, 17))
+    pet.owners.add(owner)
+    return pet
+
+
+def make_reminder(pet, fire_at, title=None):
+    title = title or f'Прививка {Event.objects.count() + 1}'
+    event = Event.objects.create(pet=pet, title=title, event_type='vaccine', date=fire_at.date())
+    reminder = ReminderSettings.objects.create(event=event, pet=pet, remind_at=time(9, 0), remind_date=fire_at.date())
+    # Время срабатывания задаём явно, чтобы не зависеть от текущих даты и часа
+    ReminderSettings.objects.filter(pk=reminder.pk).update(next_fire_at=fire_at)
+    reminder.next_fire_at = fire_at
+    return reminder
+
+
+class HookedQuerySet:
+    """Отдаёт строки queryset и посередине вызывает hook — «изменение во время пересборки»."""
+
+    def __init__(self, queryset, hook):
+        self.queryset = queryset
+        self.hook = hook
+
+    def values_list(self, *fields):
+        self.rows = list(self.queryset.values_list(*fields))
+        return self
+
+    def iterator(self, chunk_size=None):
+        for i, row in enumerate(self.rows):
+            if i == 1:
+                self.hook()
+            yield row
+
+
+@override_settings(REMINDER_SCHEDULER='redis')
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch('calendarapp.scheduler.get_connection', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pet = make_pet()
+        self.now = timezone.now().replace(microsecond=0)
+
+    def score(self, reminder):
+        return self.redis.zscore(scheduler.SCHEDULE_KEY, str(reminder.pk))
+
+    def test_schedule_many_and_unschedule(self):
+        first = make_reminder(self.pet, self.now + timedelta(hours=1))
+        second = make_reminder(self.pet, self.now + timedelta(hours=2))
+        scheduler.schedule_many([first, second])
+        self.assertEqual(self.score(first), first.next_fire_at.timestamp())
+        self.assertEqual(self.score(second), second.next_fire_at.timestamp())
+
+        # Без next_fire_at напоминание убирается из расписания
+        first.next_fire_at = None
+        scheduler.schedule_many([first])
+        self.assertIsNone(self.score(first))
+
+        scheduler.unschedule([second.pk])
+        self.assertEqual(self.redis.zcard(scheduler.SCHEDULE_KEY), 0)
+
+    @override_settings(REMINDER_SCHEDULER='poll')
+    def test_poll_mode_does_not_touch_redis(self):
+        scheduler.schedule_many([make_reminder(self.pet, self.now)])
+        self.assertEqual(self.redis.zcard(scheduler.SCHEDULE_KEY), 0)
+
+    def test_pop_due_takes_only_due_reminders_once(self):
+        due = make_reminder(self.pet, self.now - timedelta(minutes=1))
+        later = make_reminder(self.pet, self.now + timedelta(hours=1))
+        scheduler.schedule_many([due, later])
+
+        popped = scheduler.pop_due(self.now.timestamp())
+        self.assertEqual(popped, {due.pk: due.next_fire_at.timestamp()})
+        self.assertEqual(scheduler.pop_due(self.now.timestamp()), {})
+        self.assertIsNotNone(self.score(later))
+
+    def test_restore_keeps_newer_schedule(self):
+        due = make_reminder(self.pet, self.now - timedelta(minutes=1))
+        other = make_reminder(self.pet, self.now - timedelta(minutes=2))
+        scheduler.schedule_many([due, other])
+        popped = scheduler.pop_due(self.now.timestamp())
+
+        # Пока постановка в очередь падала, одно напоминание успели перепланировать
+        other.next_fire_at = self.now + timedelta(days=1)
+        scheduler.schedule_many([other])
+        scheduler.restore(popped)
+
+        self.assertEqual(self.score(due), due.next_fire_at.timestamp())
+        self.assertEqual(self.score(other), other.next_fire_at.timestamp())
+
+    def test_rebuild_replaces_schedule_from_db(self):
+        kept = make_reminder(self.pet, self.now + timedelta(hours=1))
+        self.redis.zadd(scheduler.SCHEDULE_KEY, {'999999': 1})
+
+        total = scheduler.rebuild(ReminderSettings.objects.filter(next_fire_at__isnull=False))
+
+        self.assertEqual(total, 1)
+        self.assertEqual(self.redis.zrange(scheduler.SCHEDULE_KEY, 0, -1), [str(kept.pk).encode()])
+        self.assertFalse(self.redis.exists(scheduler.REBUILDING_KEY, scheduler.JOURNAL_KEY, scheduler.REBUILD_KEY))
+
+    def test_rebuild_keeps_updates_made_while_rebuilding(self):
+        moved = make_reminder(self.pet, self.now + timedelta(hours=1))
+        removed = make_reminder(self.pet, self.now + timedelta(hours=2))
+        created = make_reminder(self.pet, self.now + timedelta(hours=3))
+        queryset = ReminderSettings.objects.filter(pk__in=[moved.pk, removed.pk])
+
+        def concurrent_updates():
+            moved.next_fire_at = self.now + timedelta(days=2)
+            scheduler.schedule_many([moved, created])
+            scheduler.unschedule([removed.pk])
+
+        scheduler.rebuild(HookedQuerySet(queryset.order_by('pk'), concurrent_updates))
+
+        self.assertEqual(self.score(moved), moved.next_fire_at.timestamp())
+        self.assertEqual(self.score(created), created.next_fire_at.timestamp())
+        self.assertIsNone(self.score(removed))
+
+    def test_pop_during_rebuild_is_not_resurrected(self):
+        due = make_reminder(self.pet, self.now - timedelta(minutes=1))
+        scheduler.schedule_many([due])
+
+        def pop():
+            self.assertIn(due.pk, scheduler.pop_due(self.now.timestamp()))
+
+        queryset = ReminderSettings.objects.filter(pk=due.pk)
+        scheduler.rebuild(HookedQuerySet(queryset.union(queryset, all=True), pop))
+        self.assertIsNone(self.score(due))
+
+    def test_scheduler_command_restores_reminders_when_enqueue_fails(self):
+        due = make_reminder(self.pet, self.now - timedelta(minutes=1))
+        scheduler.schedule_many([due])
+
+        with mock.patch(
+            'calendarapp.management.commands.run_reminder_scheduler.dispatch_scheduled_reminders.delay',
+            side_effect=ConnectionError('broker is down'),
+        ):
+            call_command('run_reminder_scheduler', '--once', stdout=mock.MagicMock(), stderr=mock.MagicMock())
+
+        self.assertEqual(self.score(due), due.next_fire_at.timestamp())
+
+    @override_settings(REMINDER_SCHEDULER='poll')
+    def test_scheduler_command_exits_in_poll_mode(self):
+        with mock.patch('calendarapp.scheduler.pop_due') as pop_due:
+            call_command('run_reminder_scheduler', stdout=mock.MagicMock())
+        pop_due.assert_not_called()
+
+
+class EagerCeleryMixin:
+    def setUp(self):
+        super().setUp()
+        conf = tasks.send_reminders.app.conf
+        eager = conf.task_always_eager
+        conf.task_always_eager = True
+        self.addCleanup(setattr, conf, 'task_always_eager', eager)
+
+
+@override_settings(REMINDER_SHARDS=3, REMINDER_BATCH_SIZE=2)
+class ReminderDispatchTests(EagerCeleryMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.pets = [make_pet(f'Питомец{i}') for i in range(4)]
+        self.digest_pet = make_pet('Сводка', notification_digest=True)
+        self.reminders = [make_reminder(pet, self.now) for pet in self.pets + [self.digest_pet] for _ in range(2)]
+
+    def run_shards(self):
+        """send_reminders с перехватом итога chord (summarize_reminder_shards)."""
+        summaries = []
+        summarize = tasks.summarize_reminder_shards.run
+
+        def capture(results):
+            summaries.append(summarize(results))
+            return summaries[-1]
+
+        with mock.patch.object(tasks.summarize_reminder_shards, 'run', side_effect=capture):
+            started = tasks.send_reminders()
+        return started, summaries
+
+    def test_chord_sends_each_reminder_once_and_aggregates(self):
+        started, summaries = self.run_shards()
+
+        shards = len({tasks.shard_for(pet.pk, 3) for pet in self.pets + [self.digest_pet]})
+        self.assertEqual(started, {'found': 10, 'shards': shards, 'count': None, 'notified': None})
+        # 8 отдельных уведомлений и одна сводка на два напоминания владельца с notification_digest
+        self.assertEqual(summaries, [{'found': 10, 'shards': shards, 'count': 10, 'notified': 9}])
+        for pet in self.pets:
+            self.assertEqual(UserNotification.objects.filter(user__pets=pet).count(), 2)
+        self.assertFalse(ReminderSettings.objects.filter(last_reminded__isnull=True).exists())
+
+        # Повторный запуск ничего не отправляет
+        _, summaries = self.run_shards()
+        self.assertEqual(summaries, [])
+        self.assertEqual(UserNotification.objects.count(), 9)
+
+    # Сводка собирается в пределах пачки — обе записи питомца должны попасть в одну
+    @override_settings(REMINDER_BATCH_SIZE=500)
+    def test_digest_owner_gets_one_notification_with_all_events(self):
+        self.run_shards()
+
+        digest = UserNotification.objects.get(user__pets=self.digest_pet)
+        self.assertEqual(len(digest.items), 2)
+        self.assertEqual(
+            {item['event_id'] for item in digest.items},
+            {str(r.event_id) for r in self.reminders if r.pet_id == self.digest_pet.pk},
+        )
+
+    def household(self, reminders_per_pet):
+        """Два питомца с общими владельцами: один со сводкой, другой без."""
+        digest_owner = CustomUser.objects.create_user(
+            username='digest_owner', email='digest@example.com', password='x', notification_digest=True,
+        )
+        co_owner = CustomUser.objects.create_user(username='co_owner', email='co@example.com', password='x')
+        pets = []
+        for name, count in zip(('Рекс', 'Мурка'), reminders_per_pet):
+            pet = Pet.objects.create(name=name, birthday=date(2021, 3, 1))
+            pet.owners.add(digest_owner, co_owner)
+            pets.append(pet)
+            for _ in range(count):
+                make_reminder(pet, self.now)
+        batch = list(tasks.due_reminders(self.now).filter(pet__in=pets))
+        return digest_owner, co_owner, batch
+
+    def test_digest_batch_for_shared_household(self):
+        digest_owner, co_owner, batch = self.household((2, 1))
+
+        claimed, notified = tasks.dispatch_reminder_batch(batch)
+
+        self.assertEqual((len(claimed), notified), (3, 4))
+        digest = UserNotification.objects.get(user=digest_owner)
+        self.assertEqual(
+            sorted((item['pet'], item['event_id']) for item in digest.items),
+            sorted((r.pet.name, str(r.event_id)) for r in batch),
+        )
+        self.assertTrue(digest.message.startswith('Напоминания на сегодня (3)'))
+        co_owner_rows = UserNotification.objects.filter(user=co_owner)
+        self.assertEqual(co_owner_rows.count(), 3)
+        self.assertFalse(co_owner_rows.exclude(items=[]).exists())
+
+    def test_digest_with_single_reminder_is_plain_notification(self):
+        digest_owner, co_owner, batch = self.household((1, 0))
+
+        self.assertEqual(tasks.dispatch_reminder_batch(batch)[1], 2)
+
+        digest = UserNotification.objects.get(user=digest_owner)
+        self.assertEqual(digest.items, [])
+        self.assertEqual(digest.message, UserNotification.objects.get(user=co_owner).message)
+
+    @override_settings(REMINDER_SHARDS=1)
+    def test_inline_mode_returns_same_shape(self):
+        self.assertEqual(tasks.send_reminders(), {'found': 10, 'shards': 1, 'count': 10, 'notified': 9})
+        self.assertEqual(tasks.send_reminders(), {'found': 0, 'shards': 1, 'count': 0, 'notified': 0})
+
+
+class ReminderClaimConcurrencyTests(TransactionTestCase):
+    """Два обработчика на отдельных соединениях не отправляют одно напоминание дважды."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.pet = make_pet()
+        self.reminders = [make_reminder(self.pet, self.now) for _ in range(3)]
+
+    def load_batch(self):
+        return list(tasks.due_reminders(self.now).filter(pet=self.pet))
+
+    def in_thread(self, target, *args):
+        def run():
+            try:
+                target(*args)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_locked_rows_are_skipped(self):
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            with transaction.atomic():
+                list(ReminderSettings.objects.select_for_update().filter(pet=self.pet))
+                locked.set()
+                release.wait(10)
+
+        holder = self.in_thread(hold_lock)
+        self.assertTrue(locked.wait(10))
+        try:
+            claimed, notified = tasks.dispatch_reminder_batch(self.load_batch())
+        finally:
+            release.set()
+            holder.join(10)
+
+        self.assertEqual((claimed, notified), ([], 0))
+        self.assertEqual(UserNotification.objects.count(), 0)
+
+    def test_two_claimers_send_each_reminder_once(self):
+        # Оба обработчика прочитали одну и ту же выборку до отправки
+        batches = [self.load_batch(), self.load_batch()]
+        barrier = threading.Barrier(2)
+        results = []
+
+        def claim(batch):
+            barrier.wait(10)
+            claimed, _ = tasks.dispatch_reminder_batch(batch)
+            results.append(len(claimed))
+
+        threads = [self.in_thread(claim, batch) for batch in batches]
+        for thread in threads:
+            thread.join(10)
+
+        # Строки могут разойтись между обработчиками, но каждая отправлена ровно одним
+        self.assertEqual(len(results), 2)
+        self.assertEqual(sum(results), 3)
+        self.assertEqual(UserNotification.objects.count(), 3)
+
+
+class PythonRolloverTests(TestCase):
+    def setUp(self):
+        self.pet = make_pet()
+        self.series = series.create_series(self.pet, 'День рождения', 'birthday', time=time(9, 0))
+        self.past = Event.objects.create(
+            pet=self.pet, title='День рождения', event_type='birthday', date=date(2024, 5, 17),
+            time=time(9, 0), is_yearly=True, series=self.series,
+        )
+        # save() переносит прошедшие ежегодные события вперёд относительно сегодняшней даты
+        Event.objects.filter(pk=self.past.pk).update(date=date(2024, 5, 17))
+        ReminderSettings.objects.create(event=self.past, pet=self.pet, remind_at=time(9, 0))
+
+    def test_rolled_over_copies_stay_in_series(self):
+        checkpoint = rollover.run_rollover(today=date(2025, 1, 10))
+
+        self.assertEqual(checkpoint.created, rollover.FUTURE_OCCURRENCES)
+        copies = Event.objects.filter(original_event=self.past)
+        self.assertEqual(
+            sorted(copies.values_list('date', 'series_id')),
+            [(date(year, 5, 17), self.series.id) for year in (2025, 2026, 2027)],
+        )
+        self.assertEqual(ReminderSettings.objects.filter(event__series=self.series).count(), 4)
+
+        # Копии удаляются вместе с серией
+        series.delete_series(self.series)
+        self.assertFalse(Event.objects.filter(pet=self.pet).exists())
+
+
+
+class SqlRolloverTests(TestCase):
+    """Функция create_next_year_yearly_events() в том виде, в каком её ставят миграции."""
+
+    def test_copies_get_series_and_updated_at(self):
+        pet = make_pet()
+        template = series.create_series(pet, 'День рождения', 'birthday', time=time(9, 0))
+        past = Event.objects.create(
+            pet=pet, title='День рождения', event_type='birthday', date=date(2024, 5, 17),
+            time=time(9, 0), is_yearly=True, series=template,
+        )
+        Event.objects.filter(pk=past.pk).update(date=date(2024, 5, 17))
+        ReminderSettings.objects.create(event=past, pet=pet, remind_at=time(9, 0))
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT create_next_year_yearly_events()')
+
+        copies = Event.objects.filter(original_event=past)
+        self.assertEqual(
+            sorted(copies.values_list('date', 'series_id')),
+            [(date(year, 5, 17), template.id) for year in (2025, 2026, 2027)],
+        )
+        self.assertFalse(copies.filter(updated_at__isnull=True).exists())
+        self.assertEqual(ReminderSettings.objects.filter(event__in=copies).count(), 3)
+
+
+@override_settings(YEARLY_EVENTS_MODE='lazy')
+class LazySeriesTests(TestCase):
+    def setUp(self):
+        self.pet = make_pet()
+        self.owner = self.pet.owners.get()
+        self.client.force_login(self.owner)
+        self.series = Event.objects.create(
+            pet=self.pet, title='Прививка', event_type='vaccine', date=date(2020, 6, 1),
+            is_yearly=True, recurrence='yearly', series=series.create_series(self.pet, 'Прививка', 'vaccine'),
+        )
+        today = timezone.localdate()
+        self.day = date(today.year, 6, 1)
+        if self.day <= today:
+            self.day = self.day.replace(year=today.year + 1)
+
+    def mark_done(self, event, day):
+        return self.client.get(reverse('calendarapp:done', args=[event.id]) + f'?date={day}')
+
+    def test_add_creates_single_series_row(self):
+        self.client.post(reverse('calendarapp:add', args=[self.pet.id]), {
+            'title': 'Стрижка', 'event_type': 'grooming', 'date': '2031-03-10', 'is_yearly': 'on',
+        })
+        self.assertEqual(list(Event.objects.filter(title='Стрижка').values_list('date', 'recurrence')),
+                         [(date(2031, 3, 10), 'yearly')])
+
+    def test_done_occurrence_skips_series_reminder(self):
+        reminder = ReminderSettings.objects.create(event=self.series, pet=self.pet, remind_at=time(9, 0))
+        self.assertEqual(timezone.localtime(reminder.next_fire_at).date(), self.day)
+
+        self.mark_done(self.series, self.day)
+
+        exception = Event.objects.get(original_event=self.series, date=self.day)
+        self.assertTrue(exception.is_done)
+        reminder.refresh_from_db()
+        self.assertEqual(timezone.localtime(reminder.next_fire_at).date(), self.day.replace(year=self.day.year + 1))
+
+    def test_done_occurrence_ignores_unrelated_event_with_same_title(self):
+        other = Event.objects.create(pet=self.pet, title='Прививка', event_type='vet', date=self.day)
+
+        self.mark_done(self.series, self.day)
+
+        other.refresh_from_db()
+        self.assertFalse(other.is_done)
+        self.assertFalse(Event.objects.filter(original_event=self.series).exists())
+
+class EventQueryCountTests(TestCase):
+    REMINDER = {'remind_at': '09:00', 'repeat': 'on', 'repeat_days': ['0', '3'], 'repeat_every': '1'}
+    ADD = {'title': 'Стрижка', 'event_type': 'grooming', 'date': '2031-03-10', 'is_yearly': 'on', **REMINDER}
+
+    def setUp(self):
+        self.pet = make_pet()
+        self.client.force_login(self.pet.owners.get())
+
+    def legacy_series(self, years):
+        """Серия без EventSeries: копии ссылаются на первое событие через original_event."""
+        main = None
+        for year in range(2031, 2031 + years):
+            event = Event.objects.create(
+                pet=self.pet, title='Прививка', event_type='vaccine', date=date(year, 6, 1),
+                is_yearly=True, original_event=main,
+            )
+            ReminderSettings.objects.create(event=event, pet=self.pet, remind_at=time(9, 0), repeat=True, repeat_days=['1'])
+            main = main or event
+        return main
+
+    def new_series(self, years):
+        """Серия через EventSeries, добавленная формой и продлённая до years лет."""
+        self.client.post(reverse('calendarapp:add', args=[self.pet.id]), self.ADD)
+        first = Event.objects.filter(title='Стрижка').order_by('date').first()
+        last = Event.objects.filter(title='Стрижка').order_by('date').last()
+        for year in range(last.date.year + 1, 2031 + years):
+            event = Event.objects.create(
+                pet=self.pet, title='Стрижка', event_type='grooming', date=date(year, 3, 10),
+                is_yearly=True, series=first.series,
+            )
+            ReminderSettings.objects.create(event=event, pet=self.pet, remind_at=time(9, 0), repeat=True, repeat_days=['0', '3'])
+        return first
+
+    def test_add_yearly_series(self):
+        with self.assertNumQueries(11):
+            self.client.post(reverse('calendarapp:add', args=[self.pet.id]), self.ADD)
+        self.assertEqual(Event.objects.filter(title='Стрижка').count(), 3)
+        self.assertEqual(ReminderSettings.objects.filter(event__title='Стрижка').count(), 3)
+
+    def test_edit_series_does_not_grow_with_length(self):
+        for years in (3, 12):
+            with self.subTest(years=years):
+                first = self.new_series(years)
+                with self.assertNumQueries(16):
+                    self.client.post(reverse('calendarapp:edit', args=[first.id]), {**self.ADD, 'date': '2031-04-11', 'apply_to_all': 'on'})
+                self.assertEqual(Event.objects.filter(title='Стрижка', date__month=4).count(), years)
+                Event.objects.filter(title='Стрижка').delete()
+
+    def test_edit_legacy_series_does_not_grow_with_length(self):
+        edit = {'title': 'Прививка', 'event_type': 'vaccine', 'date': '2031-07-02', 'is_yearly': 'on', 'apply_to_all': 'on', **self.REMINDER}
+        for years in (3, 12):
+            with self.subTest(years=years):
+                main = self.legacy_series(years)
+                with self.assertNumQueries(13):
+                    self.client.post(reverse('calendarapp:edit', args=[main.id]), edit)
+                self.assertEqual(Event.objects.filter(title='Прививка', date__month=7).count(), years)
+                Event.objects.filter(title='Прививка').delete()
+
+
+
+class IcsFeedStreamingTests(TestCase):
+    def setUp(self):
+        pet = make_pet()
+        for day in range(1, 6):
+            Event.objects.create(pet=pet, title=f'Прогулка {day}', event_type='walk', date=date(2031, 3, day))
+        self.url = reverse('calendarapp:ics', args=[ics.subscription_token(pet.owners.get())])
+
+    def sync_feed(self):
+        return b''.join(self.client.get(self.url).streaming_content)
+
+    @mock.patch.object(ics, 'ASYNC_BATCH_SIZE', 2)
+    async def test_asgi_feed_is_async_generator(self):
+        # Под ASGI синхронный итератор был бы собран в список до отправки первого байта
+        response = await self.async_client.get(self.url)
+
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), 1)
+        expected = await sync_to_async(self.sync_feed)()
+        self.assertEqual(b''.join(chunks), expected)
+        self.assertEqual(expected.count(b'BEGIN:VEVENT'), 5)
+
+
+class MeasureTests(TestCase):
+    def test_counts_inserted_updated_and_deleted_rows(self):
+        pet = make_pet()
+        with measure() as report:
+            for _ in range(3):
+                make_reminder(pet, timezone.now())
+            ReminderSettings.objects.update(last_reminded=date(2031, 1, 1))
+            Event.objects.filter(title='Прививка 1').delete()
+
+        # 3 события и 3 напоминания, минус удалённые событие с напоминанием
+        self.assertEqual(report['rows_inserted'], 4)
+        self.assertEqual(report['rows_updated'], 3 + 3)  # update() и next_fire_at в make_reminder
+        self.assertEqual(report['rows_deleted'], 2)
+        self.assertEqual(report['rows_written'], 4 + 6 + 2)
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        # 5000 напоминаний хватает, чтобы без индексов 0015 планировщик выбрал Seq Scan
+        out = StringIO()
+        call_command('check_query_plans', scale=5000, stdout=out)
+        self.assertNotIn('SEQ SCAN', out.getvalue())
@@ -1,10 +1,21 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from . import feed, ics, recurrence, scheduler
+from .signals import events_changed
 from .models import Event, ReminderSettings, EVENT_TYPES
+from .series import (
+    create_series, delete_series, series_conflicts, taken_dates, update_series, update_series_reminders,
+)
 from pets.models import Pet
+from calendar import isleap
 from datetime import date, datetime, time
+from itertools import count
 from typing import Union
 from django.utils import timezone
 import logging
@@ -29,6 +40,8 @@ WEEKDAY_CHOICES = [
     ("6", "Вс"),
 ]
 
+OCCURRENCE_TAKEN = "В этот день у питомца уже есть другое событие с таким названием."
+
 
 @login_required
 def add_event(request, pet_id):
@@ -90,60 +103,92 @@ def add_event(request, pet_id):
                     else:
                         start_date = date(start_year, event_date.month, event_date.day)
 
-                    if Event.objects.filter(pet=pet, title=title, date=start_date).exists():
+                    lazy = recurrence.lazy_mode()
+                    years_to_create = range(start_year, start_year + 3)
+
+                    series_dates = []
+                    for year in years_to_create:
+                        try:
+                            series_dates.append(date(year, event_date.month, event_date.day))
+                        except ValueError:
+                            if event_date.month == 2 and event_date.day == 29:
+                                logger.info(f"Skipping 29 Feb for year {year} for event '{title}' (Pet: {pet.name}) as {year} is not a leap year.")
+                                continue
+                            else:
+                                raise 
+
+                    if lazy and not series_dates:
+                        # 29 февраля, а в трёх годах нет високосного: серия начнётся с ближайшего
+                        series_dates.append(date(next(y for y in count(start_year + 3) if isleap(y)), 2, 29))
+
+                    # Все занятые даты серии проверяем одним запросом
+                    taken = taken_dates(pet.id, title, series_dates + [start_date])
+
+                    if start_date in taken:
                         error = f"Событие с таким названием и датой ({start_date.strftime('%Y-%m-%d')}) уже существует. Не удалось создать ежегодную серию."
                     else:
-                        years_to_create = [start_year, start_year + 1, start_year + 2] 
-
                         events_to_bulk_create = []
                         original_event_instance = None
 
                         with transaction.atomic(): 
-                            for year in years_to_create:
-                                try:
-                                    series_date = date(year, event_date.month, event_date.day)
-                                except ValueError:
-                                    if event_date.month == 2 and event_date.day == 29:
-                                        logger.info(f"Skipping 29 Feb for year {year} for event '{title}' (Pet: {pet.name}) as {year} is not a leap year.")
-                                        continue
-                                    else:
-                                        raise 
-
-                                if Event.objects.filter(pet=pet, title=title, date=series_date).exists():
-                                    logger.warning(f"Skipping creation of duplicate event for '{title}' on {series_date} for pet {pet.name} during series creation.")
-                                    continue 
-
-                                if original_event_instance is None:
-                                    original_event_instance = Event.objects.create( 
+                            event_series = create_series(pet, title, event_type, event_time, duration, note)
+                            if lazy:
+                                # В ленивом режиме храним одну строку серии с первой свободной датой,
+                                # вхождения разворачиваются на лету
+                                first_date = next((d for d in series_dates if d not in taken), None)
+                                if first_date:
+                                    original_event_instance = Event.objects.create(
                                         pet=pet,
                                         title=title,
                                         event_type=event_type,
-                                        date=series_date, 
+                                        date=first_date,
                                         time=event_time,
                                         duration_minutes=duration if duration else None,
                                         note=note,
                                         is_yearly=True,
                                         is_done=False,
-                                        original_event=None 
+                                        recurrence=recurrence.YEARLY,
+                                        series=event_series
                                     )
-                                else:
-                                    events_to_bulk_create.append(Event(
-                                        pet=pet,
-                                        title=title,
-                                        event_type=event_type,
-                                        date=series_date,
-                                        time=event_time,
-                                        duration_minutes=duration if duration else None,
-                                        note=note,
-                                        is_yearly=True,
-                                        is_done=False,
-                                        original_event=original_event_instance 
-                                    ))
+                            else:
+                                for series_date in series_dates:
+                                    if series_date in taken:
+                                        logger.warning(f"Skipping creation of duplicate event for '{title}' on {series_date} for pet {pet.name} during series creation.")
+                                        continue 
+
+                                    if original_event_instance is None:
+                                        original_event_instance = Event.objects.create( 
+                                            pet=pet,
+                                            title=title,
+                                            event_type=event_type,
+                                            date=series_date, 
+                                            time=event_time,
+                                            duration_minutes=duration if duration else None,
+                                            note=note,
+                                            is_yearly=True,
+                                            is_done=False,
+                                            original_event=None,
+                                            series=event_series
+                                        )
+                                    else:
+                                        events_to_bulk_create.append(Event(
+                                            pet=pet,
+                                            title=title,
+                                            event_type=event_type,
+                                            date=series_date,
+                                            time=event_time,
+                                            duration_minutes=duration if duration else None,
+                                            note=note,
+                                            is_yearly=True,
+                                            is_done=False,
+                                            original_event=original_event_instance,
+                                            series=event_series
+                                        ))
 
                             if events_to_bulk_create:
                                 Event.objects.bulk_create(events_to_bulk_create)
 
-                        all_series_events = [original_event_instance] + events_to_bulk_create 
+                        all_series_events = [e for e in [original_event_instance] + events_to_bulk_create if e] 
 
                         remind_at_str = request.POST.get('remind_at') or None
                         repeat = request.POST.get('repeat') == 'on'
@@ -177,18 +222,23 @@ def add_event(request, pet_id):
                                             remind_date_val = None
                                             messages.error(request, "Некорректный формат даты для напоминания.")
 
+                                # События серии только что созданы, поэтому напоминания создаём одним bulk_create
+                                reminders = []
                                 for event_instance in all_series_events: 
-                                    rs, created = ReminderSettings.objects.get_or_create(event=event_instance, defaults={'pet': pet})
-                                    rs.remind_at = remind_at_time
-                                    rs.repeat = repeat
-                                    rs.repeat_days = repeat_days
-                                    rs.repeat_every = repeat_every
-                                    rs.remind_date = remind_date_val if not repeat else None 
-                                    rs.save()
-                                    if created:
-                                        logger.info(f"Created reminder settings for event {event_instance.id}.")
-                                    else:
-                                        logger.info(f"Updated reminder settings for event {event_instance.id}.")
+                                    rs = ReminderSettings(
+                                        event=event_instance,
+                                        pet=pet,
+                                        remind_at=remind_at_time,
+                                        repeat=repeat,
+                                        repeat_days=repeat_days,
+                                        repeat_every=repeat_every,
+                                        remind_date=remind_date_val if not repeat else None,
+                                    )
+                                    rs.next_fire_at = rs.compute_next_fire_at()
+                                    reminders.append(rs)
+                                ReminderSettings.objects.bulk_create(reminders)
+                                scheduler.schedule_on_commit(reminders)
+                                logger.info(f"Created reminder settings for {len(reminders)} events of series {event_series.id}.")
 
                         messages.success(request, f"Ежегодная серия событий '{title}' успешно добавлена.")
                         if warning_message: 
@@ -314,6 +364,16 @@ def edit_event(request, event_id):
     if request.user not in event.pet.owners.all():
         return redirect('pets:list')
 
+    # Правка одного вхождения ленивой серии сохраняется как исключение
+    occurrence_date = safe_date_parse(request.GET.get('date'))
+    if (event.recurrence and occurrence_date and request.method == 'POST'
+            and request.POST.get('apply_to_all') != 'on'):
+        try:
+            event = recurrence.materialize_occurrence(event, occurrence_date)
+        except IntegrityError:
+            messages.error(request, OCCURRENCE_TAKEN)
+            return redirect(f'/pets/{event.pet_id}/?tab=calendar#{occurrence_date}')
+
     error = None
     pet_id = event.pet.id
     
@@ -375,7 +435,16 @@ def edit_event(request, event_id):
             remind_at = safe_time_parse(request.POST.get('remind_at'))
             remind_date = safe_date_parse(request.POST.get('remind_date'))
 
-            if apply_to_all:
+            if apply_to_all and event.series_id:
+                # Вся серия дня рождения обновляется постоянным числом запросов
+                with transaction.atomic():
+                    update_series(event.series, time=time, duration_minutes=duration, note=note)
+                    update_series_reminders(
+                        event.series, remind_at, reminder_repeat, repeat_days, repeat_every, remind_date
+                    )
+                messages.success(request, 'Все события дня рождения обновлены.')
+
+            elif apply_to_all:
                 # Обновляем все события дня рождения
                 with transaction.atomic():
                     birthday_events = Event.objects.select_for_update().filter(
@@ -390,6 +459,7 @@ def edit_event(request, event_id):
 
                         # Обновляем или создаём напоминание
                         rs, created = ReminderSettings.objects.get_or_create(event=ev, defaults={'pet': event.pet})
+                        rs.event = ev
                         rs.repeat = reminder_repeat
                         rs.repeat_days = repeat_days
                         rs.repeat_every = repeat_every
@@ -453,16 +523,37 @@ def edit_event(request, event_id):
                 messages.warning(request, error)
                 return redirect(f'/pets/{pet_id}/?tab=calendar#{event.date}')
 
+            if apply_to_all and event.series_id:
+                # Серия меняется целиком: один UPDATE событий и один — напоминаний
+                event_series = event.series
+                month, day = user_supplied_date.month, user_supplied_date.day
+                conflicts = series_conflicts(event_series, title, month, day)
+                if conflicts:
+                    messages.warning(request, f'Дубликат: "{title}" на {", ".join(conflicts)}. Серия не изменена.')
+                    return redirect(f'/pets/{pet_id}/?tab=calendar#{event.date}')
+
+                with transaction.atomic():
+                    update_series(
+                        event_series, month=month, day=day,
+                        title=title, event_type=event_type, time=time,
+                        duration_minutes=duration, note=note, is_yearly=is_yearly,
+                    )
+                    update_series_reminders(
+                        event_series, remind_at, reminder_repeat, repeat_days, repeat_every, remind_date
+                    )
+                messages.success(request, "Серия событий обновлена.")
+                return redirect(f'/pets/{pet_id}/?tab=calendar#{event.date}')
+
             # Получаем события для обновления
             # Получаем события для обновления
             if apply_to_all:
                 if event.original_event:
                     # Если это не оригинал серии, получаем оригинал и все связанные события
                     main_event = event.original_event
-                    events_in_series = list(main_event.recurring_events.all()) + [main_event]
+                    events_in_series = list(main_event.recurring_events.select_related('original_event')) + [main_event]
                 else:
                     # Если это оригинал серии, получаем его и все связанные события
-                    events_in_series = list(event.recurring_events.all()) + [event]
+                    events_in_series = list(event.recurring_events.select_related('original_event')) + [event]
             else:
                 # Если не применять ко всем, обновляем только текущее событие
                 events_in_series = [event]
@@ -470,19 +561,27 @@ def edit_event(request, event_id):
             events_to_update = []
             reminders_to_update = []
             used_pairs = set()
-            events_to_update = []
-            reminders_to_update = []
+
+            new_dates = {
+                ev.id: date(ev.date.year, user_supplied_date.month, user_supplied_date.day)
+                for ev in events_in_series
+            }
+            # Занятые даты и существующие напоминания — по одному запросу на всю серию
+            taken = taken_dates(event.pet_id, title, new_dates.values(), exclude_ids=list(new_dates))
+            existing_reminders = {
+                rs.event_id: rs
+                for rs in ReminderSettings.objects.filter(event_id__in=list(new_dates))
+            }
+            reminders_to_create = []
+
+            now = timezone.now()
 
             with transaction.atomic():
                 for ev in events_in_series:
-                    new_date = date(ev.date.year, user_supplied_date.month, user_supplied_date.day)
+                    new_date = new_dates[ev.id]
 
                     # Проверка дублирования
-                    if Event.objects.filter(
-                        pet=event.pet,
-                        title=title,
-                        date=new_date
-                    ).exclude(id=ev.id).exists():
+                    if new_date in taken:
                         messages.warning(request, f'Дубликат: "{title}" на {new_date}')
                         continue
 
@@ -499,11 +598,21 @@ def edit_event(request, event_id):
                     ev.time = time
                     ev.duration_minutes = duration
                     ev.note = note
-                    ev.is_yearly = is_yearly
+                    # Исключения ленивой серии остаются обычными событиями
+                    if not (ev.original_event_id and ev.original_event.recurrence):
+                        ev.is_yearly = is_yearly
+                    if not is_yearly:
+                        ev.recurrence = ''
+                    ev.updated_at = now
                     events_to_update.append(ev)
 
                     # Обновляем напоминание
-                    rs, created = ReminderSettings.objects.get_or_create(event=ev, defaults={'pet': event.pet})
+                    rs = existing_reminders.get(ev.id)
+                    if rs is None:
+                        rs = ReminderSettings(event=ev, pet_id=ev.pet_id)
+                        reminders_to_create.append(rs)
+                    else:
+                        reminders_to_update.append(rs)
                     rs.repeat = reminder_repeat
                     rs.repeat_days = repeat_days
                     rs.repeat_every = repeat_every
@@ -512,7 +621,8 @@ def edit_event(request, event_id):
                         rs.remind_date = date(ev.date.year, remind_date.month, remind_date.day) if not reminder_repeat else None
                     else:
                         rs.remind_date = None
-                    reminders_to_update.append(rs)
+                    rs.event = ev
+                    rs.next_fire_at = rs.compute_next_fire_at()
             
 
             
@@ -523,17 +633,21 @@ def edit_event(request, event_id):
                         events_to_update,
                         fields=[
                             'title', 'event_type', 'date', 'time', 
-                            'duration_minutes', 'note', 'is_yearly'
+                            'duration_minutes', 'note', 'is_yearly', 'recurrence', 'updated_at'
                         ]
                     )
+                    events_changed.send(sender=Event, pet_ids=[event.pet_id])
                 if reminders_to_update:
                     ReminderSettings.objects.bulk_update(
                         reminders_to_update,
                         fields=[
                             'repeat', 'repeat_days', 'repeat_every',
-                            'remind_at', 'remind_date'
+                            'remind_at', 'remind_date', 'next_fire_at'
                         ]
                     )
+                if reminders_to_create:
+                    ReminderSettings.objects.bulk_create(reminders_to_create)
+                scheduler.schedule_on_commit(reminders_to_create + reminders_to_update)
 
                 messages.success(
                     request,
@@ -601,16 +715,101 @@ def create_next_year_event():
             )
 
 
+@login_required
+def events_feed(request, pet_id):
+    """События питомца за видимый в календаре период (?start=&end=) в формате FullCalendar."""
+    pet = get_object_or_404(Pet, id=pet_id)
+    if not pet.owners.filter(id=request.user.id).exists():
+        return JsonResponse({'error': 'Нет доступа к календарю питомца'}, status=403)
+
+    window = feed.parse_window(request.GET.get('start'), request.GET.get('end'))
+    if window is None:
+        return JsonResponse({'error': 'Неверный период'}, status=400)
+    start, end = window
+
+    events = feed.window_queryset(pet, start, end)
+    etag, last_modified = feed.feed_state(pet, start, end, events)
+    return _conditional_response(
+        request, etag, last_modified,
+        lambda: JsonResponse(feed.serialize(events, start, end), safe=False),
+    )
+
+
+def ics_feed(request, token):
+    """
+    Подписка на календарь (.ics) для внешних приложений. Вход не нужен —
+    доступ даёт подписанная ссылка; ответ отдаётся потоково.
+    """
+    data = ics.read_token(token)
+    if data is None:
+        raise Http404
+
+    if data.get('pet'):
+        pet = Pet.objects.filter(id=data['pet'], owners__id=data['user']).only('name').first()
+        if pet is None:
+            raise Http404
+        name, filename = pet.name, f'pet-{pet.id}.ics'
+    else:
+        name, filename = 'Мои питомцы', 'pets.ics'
+
+    events = ics.subscription_events(data)
+    etag, last_modified = ics.calendar_state(events, token)
+
+    # Под ASGI синхронный итератор был бы прочитан в список целиком до отправки
+    stream = ics.astream_calendar if isinstance(request, ASGIRequest) else ics.stream_calendar
+
+    def build():
+        response = StreamingHttpResponse(
+            stream(events, name, pet_name=not data.get('pet')),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'inline; filename="{filename}"'
+        return response
+
+    return _conditional_response(request, etag, last_modified, build)
+
+
+def _conditional_response(request, etag, last_modified, build):
+    """304, если у клиента актуальная версия, иначе ответ из build() с ETag/Last-Modified."""
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build()
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Клиент хранит ответ, но каждый раз перепроверяет его по ETag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @login_required
 def mark_done(request, event_id):
     event = get_object_or_404(Event, id=event_id)
     current_year = timezone.now().year
 
+    # Вхождение ленивой серии отмечается через исключение, сама серия не меняется
+    occurrence_date = safe_date_parse(request.GET.get('date'))
+    series = None
+    if event.recurrence and occurrence_date:
+        series = event
+        try:
+            event = recurrence.materialize_occurrence(series, occurrence_date)
+        except IntegrityError:
+            messages.error(request, OCCURRENCE_TAKEN)
+            return redirect(f'/pets/{series.pet_id}/?tab=calendar#{occurrence_date}')
+        current_year = occurrence_date.year
+
     # Отмечаем текущее событие как выполненное
     event.is_done = True
     event.done_year = current_year
     event.save()
 
+    if series is not None:
+        # Напоминание серии пересчитывается без дня выполненного вхождения
+        for reminder in ReminderSettings.objects.filter(event=series):
+            reminder.save(update_fields=['next_fire_at'])
+
     return redirect(f'/pets/{event.pet.id}/?tab=calendar#{event.date}')
 
 
@@ -628,6 +827,21 @@ def delete_event(request, event_id):
 
         pet_id = event.pet.id
 
+        # Серия удаляется целиком (ленивая — всегда, вместе со своими исключениями)
+        if event.series_id and request.method == 'POST' and (
+                event.recurrence or request.POST.get('delete_all') == 'on'):
+            delete_series(event.series)
+            logger.info(f"Deleted series {event.series_id} for pet {event.pet.name}")
+            messages.success(request, f"Удалена вся серия событий '{event.title}'.")
+            return redirect(f'/pets/{pet_id}/?tab=calendar')
+        if event.recurrence and request.method == 'POST':
+            with transaction.atomic():
+                event.recurring_events.all().delete()
+                event.delete()
+            logger.info(f"Deleted yearly series {event_id} for pet {event.pet.name}")
+            messages.success(request, f"Удалена вся серия событий '{event.title}'.")
+            return redirect(f'/pets/{pet_id}/?tab=calendar')
+
         # --- Добавляем проверку для запрета удаления первого события ежегодной серии ---
         # Проверяем, является ли событие ежегодным и "оригиналом" (у него есть связанные события)
         if event.is_yearly and event.recurring_events.exists() and event.original_event is None:
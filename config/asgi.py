@@ -5,12 +5,34 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+The notification stream (Server-Sent Events) bypasses the Django handler and
+is served by accounts.push.sse_application; run with
+``uvicorn config.asgi:application``.
 """
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
+from django.urls import reverse
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+if settings.DEBUG:
+    # Как runserver: статика в режиме разработки
+    django_application = ASGIStaticFilesHandler(django_application)
+
+from accounts.push import sse_application  # noqa: E402  (после настройки Django)
+
+NOTIFICATIONS_STREAM_PATH = reverse('notifications_stream')
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == NOTIFICATIONS_STREAM_PATH:
+        await sse_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
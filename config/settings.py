@@ -17,8 +17,55 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 CELERY_BROKER_URL = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
+# Нужен для chord при шардированной отправке напоминаний
+CELERY_RESULT_BACKEND = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
 CELERY_TIMEZONE = 'Europe/Moscow'  #  Добавлен часовой пояс Celery
 
+# Допуск (в минутах) вокруг времени напоминания
+REMINDER_WINDOW_MINUTES = int(os.environ.get('REMINDER_WINDOW_MINUTES', 3))
+# Сколько напоминаний отправлять за одну транзакцию
+REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE', 500))
+# На сколько шардов (параллельных задач Celery) делить отправку напоминаний
+REMINDER_SHARDS = int(os.environ.get('REMINDER_SHARDS', 1))
+# 'poll' — send_reminders по расписанию beat, 'redis' — ZSET в Redis и цикл run_reminder_scheduler
+REMINDER_SCHEDULER = os.environ.get('REMINDER_SCHEDULER', 'poll')
+REMINDER_SCHEDULER_INTERVAL = float(os.environ.get('REMINDER_SCHEDULER_INTERVAL', 1))
+# 'materialized' — три строки на ежегодную серию, 'lazy' — одна строка, вхождения разворачиваются на лету
+YEARLY_EVENTS_MODE = os.environ.get('YEARLY_EVENTS_MODE', 'materialized')
+# 'sql' — PL/pgSQL-функция create_next_year_yearly_events, 'python' — пакетное продление calendarapp.rollover
+YEARLY_ROLLOVER_ENGINE = os.environ.get('YEARLY_ROLLOVER_ENGINE', 'sql')
+YEARLY_ROLLOVER_BATCH_SIZE = int(os.environ.get('YEARLY_ROLLOVER_BATCH_SIZE', 500))
+# Сколько секунд хранится контекст дашборда пользователя (сбрасывается сигналами pages.signals)
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 3600))
+# Сколько секунд хранится счётчик непрочитанных уведомлений (сверяется задачей reconcile_notification_counters)
+NOTIFICATION_CACHE_TIMEOUT = int(os.environ.get('NOTIFICATION_CACHE_TIMEOUT', 86400))
+# Через сколько дней прочитанные уведомления уходят из рабочей таблицы:
+# 'archive' — переносятся в ArchivedNotification, 'delete' — удаляются
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 90))
+NOTIFICATION_RETENTION_MODE = os.environ.get('NOTIFICATION_RETENTION_MODE', 'archive')
+NOTIFICATION_RETENTION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_RETENTION_BATCH_SIZE', 5000))
+# Доставка новых уведомлений через SSE (accounts.push); поток обслуживается только под ASGI
+NOTIFICATION_PUSH = os.environ.get('NOTIFICATION_PUSH', 'False') == 'True'
+# Интервал комментариев-keepalive и максимальная длительность одного потока, в секундах
+NOTIFICATION_STREAM_KEEPALIVE = int(os.environ.get('NOTIFICATION_STREAM_KEEPALIVE', 15))
+NOTIFICATION_STREAM_TIMEOUT = int(os.environ.get('NOTIFICATION_STREAM_TIMEOUT', 300))
+
+# Отрисовка Markdown статей и уроков (pages.rendering): записей в LRU процесса и срок хранения в Redis
+RENDER_LRU_SIZE = int(os.environ.get('RENDER_LRU_SIZE', 512))
+RENDER_CACHE_TIMEOUT = int(os.environ.get('RENDER_CACHE_TIMEOUT', 7 * 86400))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://redis:6379/0'),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # Недоступный Redis — это промах кэша, а не ошибка страницы
+            'IGNORE_EXCEPTIONS': True,
+        },
+    }
+}
+
 INSTALLED_APPS = [
     'accounts',
     'django.contrib.admin',
@@ -64,7 +111,6 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'accounts.context_processors.notification_count',
-                'accounts.context_processors.notification_context',
             ],
         },
     },
@@ -177,6 +223,32 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'calendarapp.tasks.create_next_year_yearly_events',
         'schedule': crontab(minute='30', hour='23'),  # Каждый день в 00:00
     },
+
+    # Сверка кэшированных счётчиков непрочитанных уведомлений с БД
+    'reconcile-notification-counters': {
+        'task': 'accounts.tasks.reconcile_notification_counters',
+        'schedule': crontab(minute='15'),  # Каждый час
+    },
+
+    # Архивация старых прочитанных уведомлений
+    'purge-read-notifications': {
+        'task': 'accounts.tasks.purge_read_notifications',
+        'schedule': crontab(minute='0', hour='4'),  # Каждый день в 04:00
+    },
+
+    # Сверка счётчиков сохранений статей и оценок уроков
+    'reconcile-catalog-counters': {
+        'task': 'pages.tasks.reconcile_catalog_counters',
+        'schedule': crontab(minute='30', hour='4'),  # Каждый день в 04:30
+    },
 }
 
+if REMINDER_SCHEDULER == 'redis':
+    # Напоминания отправляет run_reminder_scheduler, beat только сверяет расписание
+    del CELERY_BEAT_SCHEDULE['send-event-reminders']
+    CELERY_BEAT_SCHEDULE['reconcile-reminder-schedule'] = {
+        'task': 'calendarapp.tasks.reconcile_reminder_schedule',
+        'schedule': crontab(minute='45', hour='23'),
+    }
+
 CELERY_BROKER_URL = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
@@ -0,0 +1,54 @@
+"""
+Сверка денормализованных счётчиков каталога с исходными таблицами.
+
+Article.saved_count и Lesson.rating_sum/rating_count меняются через F() в
+тех же транзакциях, что и SavedArticle/LessonRating (articles.views,
+training.views). Строки, удалённые в обход этих представлений (например,
+каскадом при удалении пользователя), счётчики не поправляют — их
+выравнивает reconcile(): одним UPDATE на таблицу и только там, где
+значение разошлось.
+"""
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from articles.models import Article, SavedArticle
+from training.models import Lesson, LessonRating
+
+
+def _aggregate(queryset, expression):
+    """Значение агрегата по связанным строкам для каждой строки внешнего запроса (0, если строк нет)."""
+    return Coalesce(
+        Subquery(queryset.annotate(value=expression).values('value'), output_field=IntegerField()),
+        0,
+    )
+
+
+def expected_counters():
+    """{модель: {поле счётчика: выражение с правильным значением}}."""
+    saved = SavedArticle.objects.filter(article=OuterRef('pk')).order_by().values('article')
+    ratings = LessonRating.objects.filter(lesson=OuterRef('pk')).order_by().values('lesson')
+    return {
+        Article: {'saved_count': _aggregate(saved, Count('id'))},
+        Lesson: {
+            'rating_sum': _aggregate(ratings, Sum('rating')),
+            'rating_count': _aggregate(ratings, Count('id')),
+        },
+    }
+
+
+def reconcile(dry_run=False):
+    """Исправляет разошедшиеся счётчики; {модель: число исправленных (или найденных при dry_run) строк}."""
+    result = {}
+    for model, fields in expected_counters().items():
+        annotations = {f'expected_{name}': expression for name, expression in fields.items()}
+        drift = Q()
+        for name in fields:
+            drift |= ~Q(**{name: F(f'expected_{name}')})
+        with transaction.atomic():
+            drifted = model.objects.annotate(**annotations).filter(drift)
+            if dry_run:
+                result[model._meta.label] = drifted.count()
+            else:
+                result[model._meta.label] = model.objects.filter(pk__in=drifted.values('pk')).update(**fields)
+    return result
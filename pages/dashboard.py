@@ -0,0 +1,139 @@
+"""
+Контекст главной страницы (дашборда) с кэшем на пользователя.
+
+Контекст хранится в кэше default (Redis через django_redis) под ключом
+dashboard:<user_id> вместе с датой расчёта — на следующий день он
+пересчитывается. Сигналы pages.signals сбрасывают ключи владельцев питомца,
+когда меняются его события, сам питомец, список владельцев или дрессировки.
+Сброс выполняется после коммита транзакции, владельцы питомцев ищутся
+одним запросом на транзакцию.
+"""
+from datetime import date, timedelta
+from threading import local
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from calendarapp import recurrence
+from calendarapp.models import Event
+from pets.models import Pet
+from training.models import PetLessonProgress
+
+STATS_KEYS = {
+    'hits': 'dashboard:stats:hits',
+    'misses': 'dashboard:stats:misses',
+}
+
+_pending = local()
+
+
+def cache_key(user_id):
+    return f'dashboard:{user_id}'
+
+
+def build_context(user, today):
+    pets = Pet.objects.filter(owners=user)
+    two_weeks_later = today + timedelta(days=30)
+
+    # Получаем события на ближайшие 2 недели, которые не выполнены
+    events = Event.objects.filter(
+        pet__in=pets,
+        date__gte=today,
+        date__lte=two_weeks_later,
+        is_done=False
+    ).select_related('pet').order_by('date', 'time')  # Сортируем по дате и времени
+
+    if recurrence.lazy_mode():
+        # Ленивые ежегодные серии разворачиваем во вхождения за этот период
+        # (выполненные исключения нужны, чтобы не показать их вхождения заново)
+        events = recurrence.window_filter(
+            Event.objects.filter(pet__in=pets),
+            today, two_weeks_later,
+        ).select_related('pet')
+        events = [e for e in recurrence.expand_sorted(events, today, two_weeks_later) if not e.is_done]
+
+    # Дрессировки в процессе
+    progress = PetLessonProgress.objects.filter(
+        pet__in=pets,
+        status='in_progress'
+    ).values('pet__name', 'lesson__title')
+
+    # Ближайшие дни рождения (30 дней) считаются в БД
+    upcoming_birthdays = pets.upcoming_birthdays(30, today).values('name', 'days_until_birthday')
+
+    # В кэш кладутся простые значения, а не модели
+    return {
+        'date': today,
+        'events': [{'date': e.date, 'title': e.title, 'pet_name': e.pet.name} for e in events],
+        'progress': [{'pet_name': p['pet__name'], 'lesson_title': p['lesson__title']} for p in progress],
+        'birthdays': [{'pet_name': p['name'], 'days': p['days_until_birthday']} for p in upcoming_birthdays],
+    }
+
+
+def get_context(user):
+    today = date.today()
+    key = cache_key(user.pk)
+    context = cache.get(key)
+    if context is not None and context['date'] == today:
+        _count('hits')
+        return context
+
+    _count('misses')
+    context = build_context(user, today)
+    cache.set(key, context, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 3600))
+    return context
+
+
+def _count(name):
+    key = STATS_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def stats():
+    values = cache.get_many(list(STATS_KEYS.values()))
+    result = {name: values.get(key) or 0 for name, key in STATS_KEYS.items()}
+    total = result['hits'] + result['misses']
+    result['hit_ratio'] = round(result['hits'] / total, 4) if total else None
+    return result
+
+
+def reset_stats():
+    cache.delete_many(list(STATS_KEYS.values()))
+
+
+def _pending_sets():
+    if not hasattr(_pending, 'pet_ids'):
+        _pending.pet_ids = set()
+        _pending.user_ids = set()
+    return _pending.pet_ids, _pending.user_ids
+
+
+def invalidate(pet_ids=(), user_ids=()):
+    """
+    Сбрасывает кэш владельцев питомцев pet_ids и пользователей user_ids
+    после коммита. Накопленное за транзакцию обрабатывается один раз.
+    """
+    pending_pets, pending_users = _pending_sets()
+    pending_pets.update(pet_ids)
+    pending_users.update(user_ids)
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    pending_pets, pending_users = _pending_sets()
+    if not pending_pets and not pending_users:
+        return
+    pet_ids = set(pending_pets)
+    user_ids = set(pending_users)
+    pending_pets.clear()
+    pending_users.clear()
+
+    if pet_ids:
+        user_ids.update(
+            Pet.owners.through.objects.filter(pet_id__in=pet_ids).values_list('customuser_id', flat=True)
+        )
+    cache.delete_many([cache_key(user_id) for user_id in user_ids])
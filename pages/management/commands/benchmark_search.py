@@ -0,0 +1,134 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.paginator import Paginator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from articles.models import Article
+from pages.search import PER_PAGE, search_documents
+from training.models import Lesson
+
+PREFIX = 'bench_search_'
+CHUNK_SIZE = 2000
+
+# Осмысленные слова встречаются в тексте с заданной частотой, остальное — синтетические слова
+TOPIC_WORDS = [
+    'собака', 'щенок', 'поводок', 'прививка', 'дрессировка', 'команда', 'прогулка', 'корм',
+    'ветеринар', 'шерсть', 'когти', 'игрушка', 'ошейник', 'намордник', 'лакомство', 'поощрение',
+    'рядом', 'сидеть', 'лежать', 'апорт', 'вязка', 'стрижка', 'груминг', 'клещ', 'блохи',
+]
+SYLLABLES = ['ка', 'ро', 'ми', 'ла', 'ту', 'не', 'со', 'ва', 'ди', 'пе', 'зу', 'ша', 'ры', 'го', 'бе']
+
+
+def _filler_words(rnd, count=3000):
+    return [''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))) for _ in range(count)]
+
+
+def _text(rnd, filler, words, topic_ratio):
+    return ' '.join(
+        rnd.choice(TOPIC_WORDS) if rnd.random() < topic_ratio else rnd.choice(filler)
+        for _ in range(words)
+    )
+
+
+def icontains_page(text, page_number=1):
+    """То, как искали бы без полнотекстового индекса: подстрока в заголовке или тексте."""
+    articles = Article.objects.filter(Q(title__icontains=text) | Q(content__icontains=text)).values('id', 'title')
+    lessons = Lesson.objects.filter(
+        Q(title__icontains=text) | Q(description__icontains=text) | Q(text_content__icontains=text)
+    ).values('id', 'title')
+    return Paginator(articles.union(lessons, all=True).order_by('title', 'id'), PER_PAGE).get_page(page_number)
+
+
+class Command(BaseCommand):
+    help = 'Сравнение полнотекстового поиска (GIN) с icontains на синтетических статьях и уроках (JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=20000)
+        parser.add_argument('--lessons', type=int, default=5000)
+        parser.add_argument('--words', type=int, default=300, help='Слов в тексте документа')
+        parser.add_argument('--topic-ratio', type=float, default=0.0005,
+                            help='Доля осмысленных слов в тексте (каждое слово запроса — примерно в 0.5%% документов)')
+        parser.add_argument('--queries', nargs='+', default=['поводок', 'прививка or щенок', 'дрессировка команда'])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help='Не удалять данные после замера')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Полнотекстовый поиск рассчитан на PostgreSQL')
+
+        self.cleanup()
+        try:
+            started = time.perf_counter()
+            self.seed(options['articles'], options['lessons'], options['words'], options['topic_ratio'])
+            seed_s = round(time.perf_counter() - started, 2)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE articles_article, training_lesson')
+
+            results = []
+            for text in options['queries']:
+                fts_ms, fts_page = self.timed(lambda: search_documents(text), options['repeat'])
+                like_ms, like_page = self.timed(lambda: icontains_page(text), options['repeat'])
+                results.append({
+                    'query': text,
+                    'fts_ms': fts_ms,
+                    'fts_found': fts_page.paginator.count,
+                    'icontains_ms': like_ms,
+                    'icontains_found': like_page.paginator.count,
+                    'speedup': round(like_ms / fts_ms, 1) if fts_ms else None,
+                })
+                self.stderr.write(f'{text}: FTS {fts_ms} мс, icontains {like_ms} мс')
+        finally:
+            if not options['keep']:
+                self.cleanup()
+
+        self.stdout.write(json.dumps({
+            'articles': options['articles'],
+            'lessons': options['lessons'],
+            'seed_s': seed_s,
+            'queries': results,
+        }, ensure_ascii=False, indent=2))
+
+    def timed(self, run, repeat):
+        """
+        Медиана времени страницы результатов (поиск, подсчёт и выборка), мс.
+        Без tracemalloc (calendarapp.benchmarks.measure): он замедляет Python в разы и искажает сравнение.
+        """
+        times = []
+        page = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            page = run()
+            page.paginator.count
+            list(page.object_list)
+            times.append((time.perf_counter() - started) * 1000)
+        return round(statistics.median(times), 2), page
+
+    def seed(self, n_articles, n_lessons, words, topic_ratio):
+        rnd = random.Random(42)
+        filler = _filler_words(rnd)
+        for start in range(0, n_articles, CHUNK_SIZE):
+            Article.objects.bulk_create([
+                Article(
+                    title=f'{PREFIX}{i} {_text(rnd, filler, 4, topic_ratio)}',
+                    content=_text(rnd, filler, words, topic_ratio),
+                )
+                for i in range(start, min(start + CHUNK_SIZE, n_articles))
+            ])
+        for start in range(0, n_lessons, CHUNK_SIZE):
+            Lesson.objects.bulk_create([
+                Lesson(
+                    title=f'{PREFIX}{i} {_text(rnd, filler, 4, topic_ratio)}',
+                    description=_text(rnd, filler, 30, topic_ratio),
+                    text_content=_text(rnd, filler, words, topic_ratio),
+                )
+                for i in range(start, min(start + CHUNK_SIZE, n_lessons))
+            ])
+
+    def cleanup(self):
+        Article.objects.filter(title__startswith=PREFIX).delete()
+        Lesson.objects.filter(title__startswith=PREFIX).delete()
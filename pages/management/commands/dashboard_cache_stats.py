@@ -0,0 +1,17 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from pages.dashboard import reset_stats, stats
+
+
+class Command(BaseCommand):
+    help = 'Счётчики попаданий и промахов кэша дашборда (JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулить счётчики после вывода')
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(stats(), ensure_ascii=False))
+        if options['reset']:
+            reset_stats()
@@ -0,0 +1,15 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from pages.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики сохранений статей и оценок уроков с исходными таблицами (JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать разошедшиеся строки')
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(reconcile(dry_run=options['dry_run']), ensure_ascii=False))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from articles.models import Article
+from pages.rendering import render_markdown
+from training.models import Lesson
+
+CHUNK_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = 'Отрисовывает все статьи и уроки в кэш Markdown (после деплоя или смены настроек отрисовки)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        sources = [
+            ('статей', Article.objects.values_list('content', flat=True)),
+            ('уроков', Lesson.objects.exclude(text_content='').values_list('text_content', flat=True)),
+        ]
+        for label, texts in sources:
+            count = 0
+            for text in texts.iterator(chunk_size=CHUNK_SIZE):
+                render_markdown(text)
+                count += 1
+            self.stdout.write(f'Отрисовано {label}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Готово за {time.perf_counter() - started:.1f} с'))
@@ -0,0 +1,79 @@
+"""
+Keyset-пагинация каталогов (статьи, уроки).
+
+Вместо OFFSET следующая страница начинается строго после последней строки
+предыдущей по ключу сортировки, например (created_at, id). С индексом по этому
+ключу любая страница стоит столько же, сколько первая. Курсор — значения ключа
+последней строки в JSON, закодированном base64 для URL.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+PER_PAGE = 24
+
+
+def _json_default(value):
+    # Дата со всеми микросекундами: DjangoJSONEncoder обрезает их до миллисекунд, и курсор терял бы строки
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=_json_default).encode()).decode()
+
+
+def decode_cursor(cursor, size):
+    """Значения ключа из курсора или ValueError."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f'Неверный курсор: {e}')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Неверный курсор')
+    # Курсор приходит от клиента: в значениях ключа допустимы только строки и числа
+    if not all(isinstance(value, (str, int)) and not isinstance(value, bool) for value in values):
+        raise ValueError('Неверный курсор')
+    return values
+
+
+def after(ordering, values):
+    """
+    Условие «строго после (values)» для сортировки ordering, например ('-created_at', '-id').
+    Лишняя на вид граница по первому полю позволяет PostgreSQL идти по индексу
+    с этого места в нужном порядке и остановиться на LIMIT, а не собирать все
+    оставшиеся строки в bitmap и сортировать их.
+    """
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    first = ordering[0]
+    bound = 'lte' if first.startswith('-') else 'gte'
+    return Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & condition
+
+
+def keyset_page(queryset, ordering, cursor=None, per_page=PER_PAGE):
+    """
+    Страница queryset по ключу ordering: (объекты, курсор следующей страницы
+    или None). Неверный курсор — ValueError.
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(ordering))
+        try:
+            queryset = queryset.filter(after(ordering, values))
+        except (ValidationError, TypeError) as e:
+            raise ValueError(f'Неверный курсор: {e}')
+    items = list(queryset.order_by(*ordering)[:per_page + 1])
+    if len(items) <= per_page:
+        return items, None
+    items = items[:per_page]
+    last = items[-1]
+    return items, encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
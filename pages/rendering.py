@@ -0,0 +1,148 @@
+"""
+Отрисовка Markdown статей и уроков в безопасный HTML с двухуровневым кэшем.
+
+render() ищет результат сначала в LRU внутри процесса (RENDER_LRU_SIZE
+записей), затем в кэше default (Redis) под ключом markdown:<хэш> и только
+потом вызывает markdown и bleach. Хэш считается по тексту и отпечатку
+настроек (расширения, разрешённые теги и атрибуты, RENDER_VERSION), поэтому
+смена настроек сама делает старые записи недействительными.
+
+Счётчики попаданий по уровням и время отрисовки копятся в процессе и
+сбрасываются в кэш пачками (при обращении к Redis или каждые FLUSH_EVERY
+вызовов), чтобы попадание в LRU не стоило запроса к Redis.
+"""
+import hashlib
+import json
+import time
+from collections import Counter, OrderedDict
+from threading import Lock
+
+import bleach
+import markdown
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.html import strip_tags
+
+RENDER_VERSION = 1
+EXCERPT_WORDS = 30
+EXTENSIONS = ['fenced_code', 'codehilite']
+FLUSH_EVERY = 100
+
+# Разрешённые теги и атрибуты для Bleach
+ALLOWED_TAGS = [
+    'a', 'abbr', 'acronym', 'b', 'blockquote', 'code',
+    'em', 'i', 'li', 'ol', 'strong', 'ul', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'p', 'br', 'pre', 'img',
+    'span'
+]
+ALLOWED_ATTRIBUTES = {
+    '*': ['class', 'style'],
+    'a': ['href', 'title'],
+    'img': ['src', 'alt', 'title'],
+}
+
+CONFIG_FINGERPRINT = hashlib.sha256(json.dumps(
+    [RENDER_VERSION, EXTENSIONS, ALLOWED_TAGS, ALLOWED_ATTRIBUTES], sort_keys=True,
+).encode()).hexdigest()[:16]
+
+STATS_KEYS = {
+    'lru_hits': 'markdown:stats:lru_hits',
+    'cache_hits': 'markdown:stats:cache_hits',
+    'misses': 'markdown:stats:misses',
+    'render_ms': 'markdown:stats:render_ms',
+}
+
+_lru = OrderedDict()
+_lock = Lock()
+_pending = Counter()
+
+
+def content_hash(text):
+    return hashlib.sha256(f'{CONFIG_FINGERPRINT}:{text}'.encode()).hexdigest()
+
+
+def cache_key(digest):
+    return f'markdown:{digest}'
+
+
+def _render(text):
+    html_content = markdown.markdown(text, extensions=EXTENSIONS)
+    return bleach.clean(html_content, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES)
+
+
+def _lru_get(digest):
+    with _lock:
+        html = _lru.get(digest)
+        if html is not None:
+            _lru.move_to_end(digest)
+        return html
+
+
+def _lru_set(digest, html):
+    with _lock:
+        _lru[digest] = html
+        _lru.move_to_end(digest)
+        while len(_lru) > getattr(settings, 'RENDER_LRU_SIZE', 512):
+            _lru.popitem(last=False)
+
+
+def _count(name, value=1, flush=False):
+    with _lock:
+        _pending[name] += value
+        if not flush and sum(_pending.values()) < FLUSH_EVERY:
+            return
+        pending = dict(_pending)
+        _pending.clear()
+    for key, n in pending.items():
+        try:
+            cache.incr(STATS_KEYS[key], n)
+        except ValueError:
+            cache.set(STATS_KEYS[key], n, timeout=None)
+
+
+def render_markdown(text):
+    """Безопасный HTML для Markdown-текста."""
+    if not text:
+        return ''
+    digest = content_hash(text)
+    html = _lru_get(digest)
+    if html is not None:
+        _count('lru_hits')
+        return html
+
+    html = cache.get(cache_key(digest))
+    if html is not None:
+        _count('cache_hits', flush=True)
+    else:
+        started = time.perf_counter()
+        html = _render(text)
+        _count('render_ms', round((time.perf_counter() - started) * 1000))
+        _count('misses', flush=True)
+        cache.set(cache_key(digest), html, getattr(settings, 'RENDER_CACHE_TIMEOUT', 7 * 86400))
+    _lru_set(digest, html)
+    return html
+
+
+def make_excerpt(html, words=EXCERPT_WORDS):
+    """Текст без тегов, сокращённый до `words` слов."""
+    stripped_text = strip_tags(html)
+    parts = stripped_text.split()
+    if len(parts) > words:
+        return ' '.join(parts[:words]) + '...'
+    return stripped_text
+
+
+def stats():
+    _count('lru_hits', 0, flush=True)
+    values = cache.get_many(list(STATS_KEYS.values()))
+    result = {name: values.get(key) or 0 for name, key in STATS_KEYS.items()}
+    total = result['lru_hits'] + result['cache_hits'] + result['misses']
+    result['hit_ratio'] = round((total - result['misses']) / total, 4) if total else None
+    result['avg_render_ms'] = round(result['render_ms'] / result['misses'], 2) if result['misses'] else None
+    return result
+
+
+def reset_stats():
+    with _lock:
+        _pending.clear()
+    cache.delete_many(list(STATS_KEYS.values()))
@@ -0,0 +1,89 @@
+"""
+Полнотекстовый поиск по статьям и урокам (PostgreSQL, конфигурация russian).
+
+Колонку search_vector у Article и Lesson заполняют триггеры БД (миграции
+articles 0004 и training 0004) с весами: заголовок A, текст B/C. По ней
+построены GIN-индексы. Страница результатов собирается в два шага: сначала
+одним запросом (UNION по двум таблицам) выбираются id и ранг совпадений
+нужной страницы, затем для этих строк считается ts_headline — подсветка
+дорогая, и считать её для всех совпадений незачем.
+"""
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.core.paginator import Paginator
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from articles.models import Article
+from training.models import Lesson
+
+CONFIG = 'russian'
+PER_PAGE = 20
+# Маркеры подсветки: текст экранируется целиком, а маркеры заменяются на <mark>
+START_SEL = '{{{'
+STOP_SEL = '}}}'
+HEADLINE_OPTIONS = {'max_words': 35, 'min_words': 15, 'max_fragments': 2, 'fragment_delimiter': ' … '}
+
+SOURCES = {
+    'article': (Article, 'content', 'articles:detail'),
+    'lesson': (Lesson, Concat('description', Value(' '), 'text_content'), 'training:lesson_detail'),
+}
+
+
+def parse_query(text):
+    return SearchQuery(text, config=CONFIG, search_type='websearch')
+
+
+def ranked(query):
+    """id и ранг совпадений по обеим таблицам, лучшие первыми."""
+    querysets = [
+        model.objects.filter(search_vector=query)
+        .annotate(kind=Value(kind), rank=SearchRank(F('search_vector'), query))
+        .values('kind', 'id', 'rank')
+        for kind, (model, _, _) in SOURCES.items()
+    ]
+    return querysets[0].union(*querysets[1:], all=True).order_by('-rank', 'id')
+
+
+def highlight(headline):
+    parts = []
+    for i, chunk in enumerate(headline.split(START_SEL)):
+        if i:
+            marked, _, rest = chunk.partition(STOP_SEL)
+            parts.append(f'<mark>{escape(marked)}</mark>{escape(rest)}')
+        else:
+            parts.append(escape(chunk))
+    return mark_safe(''.join(parts))
+
+
+def _documents(kind, ids, query):
+    model, text, url_name = SOURCES[kind]
+    rows = model.objects.filter(id__in=ids).annotate(
+        headline=SearchHeadline(text, query, config=CONFIG, start_sel=START_SEL, stop_sel=STOP_SEL, **HEADLINE_OPTIONS),
+    ).values('id', 'title', 'headline')
+    return {
+        row['id']: {
+            'kind': kind,
+            'title': row['title'],
+            'headline': highlight(row['headline']),
+            'url': reverse(url_name, args=[row['id']]),
+        }
+        for row in rows
+    }
+
+
+def search_documents(text, page_number=1, per_page=PER_PAGE):
+    """Страница (django.core.paginator.Page) найденных документов с подсветкой."""
+    query = parse_query(text)
+    page = Paginator(ranked(query), per_page).get_page(page_number)
+    hits = list(page.object_list)
+
+    documents = {}
+    for kind in SOURCES:
+        ids = [hit['id'] for hit in hits if hit['kind'] == kind]
+        if ids:
+            documents.update(_documents(kind, ids, query))
+    page.object_list = [documents[hit['id']] for hit in hits if hit['id'] in documents]
+    return page
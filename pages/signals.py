@@ -0,0 +1,49 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from calendarapp.models import Event
+from calendarapp.signals import events_changed
+from pets.models import Pet
+from training.models import PetLessonProgress
+
+from . import dashboard
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=PetLessonProgress)
+@receiver(post_delete, sender=PetLessonProgress)
+def pet_data_changed(sender, instance, **kwargs):
+    dashboard.invalidate(pet_ids=[instance.pet_id])
+
+
+@receiver(events_changed)
+def pet_events_changed(sender, pet_ids, **kwargs):
+    dashboard.invalidate(pet_ids=pet_ids)
+
+
+@receiver(post_save, sender=Pet)
+def pet_saved(sender, instance, **kwargs):
+    dashboard.invalidate(pet_ids=[instance.pk])
+
+
+@receiver(pre_delete, sender=Pet)
+def pet_deleted(sender, instance, **kwargs):
+    # После удаления связи с владельцами уже не найти
+    dashboard.invalidate(user_ids=instance.owners.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Pet.owners.through)
+def pet_owners_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Запоминаем владельцев до очистки
+        if reverse:
+            dashboard.invalidate(user_ids=[instance.pk])
+        else:
+            dashboard.invalidate(user_ids=instance.owners.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        if reverse:
+            # instance — пользователь, pk_set — его питомцы
+            dashboard.invalidate(pet_ids=pk_set, user_ids=[instance.pk])
+        else:
+            dashboard.invalidate(pet_ids=[instance.pk], user_ids=pk_set)
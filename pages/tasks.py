@@ -0,0 +1,15 @@
+import logging
+
+from celery import shared_task
+
+from . import counters
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_catalog_counters():
+    """Выравнивает saved_count статей и суммы оценок уроков (pages.counters)."""
+    fixed = counters.reconcile()
+    logger.info(f"[COUNTERS] Исправлено счётчиков каталога: {fixed}")
+    return fixed
@@ -1,3 +1,78 @@
-from django.test import TestCase
+import base64
+import json
+from datetime import datetime, timezone
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from articles.models import Article, SavedArticle
+from training.models import Lesson, LessonRating
+
+from . import counters
+from .pagination import after, decode_cursor, encode_cursor
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        values = ['Уроки', 'f1f5c1d2-7d8e-4b7a-9a43-2f0e7d3c1a10']
+        self.assertEqual(decode_cursor(encode_cursor(values), 2), values)
+
+    def test_keeps_microseconds(self):
+        moment = datetime(2026, 10, 18, 7, 33, 49, 123456, tzinfo=timezone.utc)
+        value, _ = decode_cursor(encode_cursor([moment, 1]), 2)
+        self.assertEqual(datetime.fromisoformat(value), moment)
+
+    def test_bad_cursors(self):
+        for cursor in (
+            'не base64!', base64.urlsafe_b64encode(b'{').decode(),
+            raw_cursor({'a': 1}), raw_cursor(['x']), raw_cursor([{}, 'x']),
+            raw_cursor([None, 'x']), raw_cursor([['x'], 'x']), raw_cursor([True, 'x']),
+        ):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cursor(cursor, 2)
+
+    def test_after_condition(self):
+        condition = after(('-created_at', '-id'), ['2026-10-18T07:33:49', 'b'])
+        self.assertIn(('created_at__lte', '2026-10-18T07:33:49'), condition.children)
+
+
+class ArticleListCursorTests(TestCase):
+    def test_bad_cursor_is_bad_request(self):
+        for values in ([{}, 'x'], ['не дата', 'x'], ['2026-10-18T07:33:49+00:00', 'не uuid']):
+            with self.subTest(values=values):
+                response = self.client.get(reverse('articles:list'), {'cursor': raw_cursor(values)})
+                self.assertEqual(response.status_code, 400)
+
+
+class ReconcileCountersTests(TestCase):
+    def test_fixes_drift_both_ways(self):
+        users = [
+            CustomUser.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='x')
+            for i in range(2)
+        ]
+        lagging = Article.objects.create(title='Отстал', content='Текст')
+        ahead = Article.objects.create(title='Убежал', content='Текст')
+        exact = Article.objects.create(title='Верный', content='Текст')
+        lesson = Lesson.objects.create(title='Лежать')
+        for user in users:
+            SavedArticle.objects.create(user=user, article=lagging)
+            LessonRating.objects.create(user=user, lesson=lesson, rating=4)
+        SavedArticle.objects.create(user=users[0], article=exact)
+        Article.objects.filter(pk=ahead.pk).update(saved_count=3)
+        Article.objects.filter(pk=exact.pk).update(saved_count=1)
+        Lesson.objects.filter(pk=lesson.pk).update(rating_sum=20, rating_count=1)
+
+        self.assertEqual(counters.reconcile(dry_run=True), {'articles.Article': 2, 'training.Lesson': 1})
+        self.assertEqual(counters.reconcile(), {'articles.Article': 2, 'training.Lesson': 1})
+
+        self.assertEqual(
+            dict(Article.objects.values_list('title', 'saved_count')),
+            {'Отстал': 2, 'Убежал': 0, 'Верный': 1},
+        )
+        self.assertEqual(Lesson.objects.values_list('rating_sum', 'rating_count').get(), (8, 2))
+        self.assertEqual(counters.reconcile(), {'articles.Article': 0, 'training.Lesson': 0})
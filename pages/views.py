@@ -1,43 +1,19 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
-from pets.models import Pet
-from calendarapp.models import Event
-from training.models import PetLessonProgress
-from datetime import date, timedelta
+from .dashboard import get_context
+from .search import search_documents
 
 @login_required
 def dashboard(request):
-    pets = Pet.objects.filter(owners=request.user)
-    today = date.today()
-    two_weeks_later = today + timedelta(days=30)
-
-    # Получаем события на ближайшие 2 недели, которые не выполнены
-    events = Event.objects.filter(
-        pet__in=pets,
-        date__gte=today,
-        date__lte=two_weeks_later,
-        is_done=False
-    ).order_by('date', 'time')  # Сортируем по дате и времени
-
-    # Дрессировки в процессе
-    progress = PetLessonProgress.objects.filter(
-        pet__in=pets,
-        status='in_progress'
-    )
-
-    # Ближайшие дни рождения (30 дней)
-    upcoming_birthdays = []
-    for pet in pets:
-        if pet.birthday:
-            next_bd = pet.birthday.replace(year=today.year)
-            if next_bd < today:
-                next_bd = next_bd.replace(year=today.year + 1)
-            days_left = (next_bd - today).days
-            if days_left <= 30:
-                upcoming_birthdays.append((pet, days_left))
-
+    # Контекст считается один раз и берётся из кэша до изменения данных пользователя
+    context = get_context(request.user)
     return render(request, 'dashboard.html', {
-        'events': events,  # Теперь без ограничения количества
-        'progress': progress,
-        'birthdays': upcoming_birthdays,
+        'events': context['events'],  # Теперь без ограничения количества
+        'progress': context['progress'],
+        'birthdays': context['birthdays'],
     })
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page = search_documents(query, request.GET.get('page')) if query else None
+    return render(request, 'search.html', {'query': query, 'page': page})
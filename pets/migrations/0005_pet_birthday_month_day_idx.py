@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:21
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.datetime
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0004_pet_features'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.functions.datetime.ExtractMonth('birthday'), '*', models.Value(100)), '+', django.db.models.functions.datetime.ExtractDay('birthday')), name='pet_birthday_month_day_idx'),
+        ),
+    ]
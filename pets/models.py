@@ -1,10 +1,92 @@
 import uuid
 from django.db import models
+from django.db.models import DateField, Func, IntegerField, Q
+from django.db.models.functions import ExtractDay, ExtractMonth
 from django.contrib.auth import get_user_model
-from datetime import date
+from datetime import date, timedelta
+from calendar import isleap
 
 User = get_user_model()
 
+
+def birthday_month_day():
+    """Месяц и день рождения одним числом (MMDD) — по этому выражению построен индекс."""
+    return ExtractMonth('birthday') * 100 + ExtractDay('birthday')
+
+
+class NextBirthday(Func):
+    """
+    Ближайший день рождения начиная с `today` (PostgreSQL). Дата + интервал
+    в годах у 29 февраля в невисокосный год даёт 28 февраля.
+    """
+    output_field = DateField()
+
+    def __init__(self, expression, today, **extra):
+        self.today = today
+        super().__init__(expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        birthday, params = compiler.compile(self.source_expressions[0])
+
+        def in_year(shift):
+            sql = (
+                f"({birthday} + make_interval(years => %s - EXTRACT(YEAR FROM {birthday})::int + {shift}))::date"
+            )
+            return sql, [*params, self.today.year, *params]
+
+        this_year, this_params = in_year(0)
+        next_year, next_params = in_year(1)
+        sql = f"CASE WHEN {this_year} >= %s THEN {this_year} ELSE {next_year} END"
+        return sql, [*this_params, self.today, *this_params, *next_params]
+
+
+class DaysUntilBirthday(NextBirthday):
+    output_field = IntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+        return f"({sql} - %s::date)", [*params, self.today]
+
+
+class PetQuerySet(models.QuerySet):
+    def with_next_birthday(self, today=None):
+        """Добавляет next_birthday и days_until_birthday, вычисленные в БД."""
+        today = today or date.today()
+        return self.annotate(
+            next_birthday=NextBirthday('birthday', today),
+            days_until_birthday=DaysUntilBirthday('birthday', today),
+        )
+
+    def upcoming_birthdays(self, days=30, today=None):
+        """
+        Питомцы, у которых день рождения в ближайшие `days` дней, по возрастанию
+        оставшихся дней. Отбор по MMDD идёт по индексу pet_birthday_month_day_idx.
+        """
+        today = today or date.today()
+        end = today + timedelta(days=days)
+        start_md = today.month * 100 + today.day
+        end_md = end.month * 100 + end.day
+        if end.month == 2 and end.day == 28 and not isleap(end.year):
+            end_md = 229  # 29 февраля празднуется 28-го
+
+        if days >= 365:
+            window = Q()
+        elif start_md <= end_md:
+            window = Q(birthday_md__gte=start_md, birthday_md__lte=end_md)
+        else:
+            # Период переходит через Новый год
+            window = Q(birthday_md__gte=start_md) | Q(birthday_md__lte=end_md)
+
+        return (
+            self.filter(birthday__isnull=False)
+            .alias(birthday_md=birthday_month_day())
+            .filter(window)
+            .with_next_birthday(today)
+            .filter(days_until_birthday__lte=days)
+            .order_by('days_until_birthday', 'name')
+        )
+
+
 class Pet(models.Model):
     GENDER_CHOICES = [
         ('M', 'Мальчик'),
@@ -21,6 +103,14 @@ class Pet(models.Model):
     features = models.TextField(verbose_name='Особенности', blank=True, null=True, 
                                help_text='Аллергии, хронические заболевания и другие особенности питомца')
 
+    objects = PetQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Ближайшие дни рождения: PetQuerySet.upcoming_birthdays
+            models.Index(birthday_month_day(), name='pet_birthday_month_day_idx'),
+        ]
+
 
 
     def __str__(self):
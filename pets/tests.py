@@ -1,3 +1,28 @@
+from datetime import date
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from calendarapp.models import Event, ReminderSettings
+
+from .models import Pet
+from .views import create_or_update_birthday_event
+
+
+class FrozenDate(date):
+    @classmethod
+    def today(cls):
+        return cls(2029, 1, 10)
+
+
+class BirthdayEventTests(TestCase):
+    @mock.patch('pets.views.date', FrozenDate)
+    def test_feb_29_without_leap_year_in_window(self):
+        # В 2029–2031 нет 29 февраля: день рождения переносится в 2032 год
+        pet = Pet.objects.create(name='Барсик', birthday=date(2020, 2, 29))
+
+        create_or_update_birthday_event(pet)
+
+        events = Event.objects.filter(pet=pet, event_type='birthday')
+        self.assertEqual(list(events.values_list('date', flat=True)), [date(2032, 2, 29)])
+        self.assertTrue(ReminderSettings.objects.filter(event__in=events).exists())
@@ -5,8 +5,13 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from .models import Pet
 from training.models import Lesson, PetLessonProgress
-from calendarapp.models import Event, ReminderSettings
+from django.urls import reverse
+from calendarapp import ics, recurrence
+from calendarapp.models import Event, EventSeries, ReminderSettings
+from calendarapp.series import create_series
 from datetime import date, timedelta, datetime, time
+from calendar import isleap
+from itertools import count
 import copy
 
 @login_required
@@ -61,7 +66,6 @@ def pet_edit(request, pet_id):
         if request.FILES.get('photo'):
             pet.photo = request.FILES['photo']
         pet.save()
-        Event.objects.filter(pet=pet, event_type='birthday', is_yearly=True).delete()
         create_or_update_birthday_event(pet)
         return redirect('pets:detail', pet_id=pet.id)
 
@@ -70,7 +74,7 @@ def pet_edit(request, pet_id):
 
 @login_required
 def pet_detail(request, pet_id):
-    pet = get_object_or_404(Pet, id=pet_id)
+    pet = get_object_or_404(Pet.objects.with_next_birthday(), id=pet_id)
 
     if request.user not in pet.owners.all():
         return redirect('pets:list')
@@ -83,12 +87,8 @@ def pet_detail(request, pet_id):
         birthday_soon = None
 
         if pet.birthday:
-            today = date.today()
-            next_birthday = pet.birthday.replace(year=today.year)
-            if next_birthday < today:
-                next_birthday = next_birthday.replace(year=today.year + 3)
-
-            delta = (next_birthday - today).days
+            # Дней до ближайшего дня рождения (с учётом 29 февраля) — из аннотации
+            delta = pet.days_until_birthday
             if delta == 0:
                 birthday_today = True
             elif delta <= 7:
@@ -100,10 +100,9 @@ def pet_detail(request, pet_id):
         })
 
     elif tab == 'calendar':
-        today = date.today()
-        # Просто выводим ВСЕ события питомца (никаких автосозданий!)
-        events = Event.objects.filter(pet=pet).order_by('date', 'time')
-        context['events'] = events
+        # События календарь подгружает сам из calendarapp:feed, здесь — только ссылка на подписку
+        token = ics.subscription_token(request.user, pet)
+        context['ics_url'] = request.build_absolute_uri(reverse('calendarapp:ics', args=[token]))
 
     elif tab == 'training':
         lessons = Lesson.objects.all()
@@ -139,13 +138,47 @@ def create_or_update_birthday_event(pet):
     else:
         pet_birthday = pet.birthday
 
-    # Удаляем старое событие, если оно существует
+    # Удаляем старое событие, если оно существует (вместе с исключениями ленивой серии)
+    Event.objects.filter(pet=pet, event_type='birthday', original_event__recurrence=recurrence.YEARLY).delete()
     Event.objects.filter(pet=pet, event_type='birthday', is_yearly=True).delete()
+    EventSeries.objects.filter(pet=pet, event_type='birthday').delete()
+    birthday_series = create_series(pet, 'День рождения', 'birthday')
+
+    if recurrence.lazy_mode():
+        # Одна строка серии с датой рождения, вхождения разворачиваются на лету
+        event = Event.objects.create(
+            pet=pet,
+            title='День рождения',
+            event_type='birthday',
+            date=pet_birthday,
+            is_yearly=True,
+            is_done=False,
+            recurrence=recurrence.YEARLY,
+            series=birthday_series,
+        )
+        ReminderSettings.objects.update_or_create(
+            event=event,
+            defaults={
+                'pet': pet,
+                'repeat': True,
+                'repeat_every': 365,
+                'remind_at': time(9, 0)
+            }
+        )
+        return
 
     current_year = date.today().year
-    for year in [current_year, current_year + 1, current_year + 2]:
-        new_date = pet_birthday.replace(year=year)
-        Event.objects.create(
+    years = [current_year, current_year + 1, current_year + 2]
+    if (pet_birthday.month, pet_birthday.day) == (2, 29) and not any(isleap(year) for year in years):
+        # В трёх ближайших годах нет високосного (например, 2029–2031): берём следующий високосный
+        years.append(next(year for year in count(current_year + 3) if isleap(year)))
+    created = []
+    for year in years:
+        try:
+            new_date = pet_birthday.replace(year=year)
+        except ValueError:
+            continue  # 29 февраля в невисокосный год, как и при продлении серий
+        created.append(Event.objects.create(
             pet=pet,
             title='День рождения',
             event_type='birthday',
@@ -154,13 +187,16 @@ def create_or_update_birthday_event(pet):
             duration_minutes=None,
             note='',
             is_yearly=True,
-            is_done=False
-        )
+            is_done=False,
+            series=birthday_series
+        ))
+
+    if not created:
+        return
 
     # Настраиваем напоминание
-    event = Event.objects.get(pet=pet, event_type='birthday', date=pet_birthday.replace(year=current_year))
     ReminderSettings.objects.update_or_create(
-        event=event,
+        event=created[0],
         defaults={
             'pet': pet,
             'repeat': True,
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION training_lesson_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('russian', coalesce(NEW.text_content, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER training_lesson_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, description, text_content ON training_lesson
+    FOR EACH ROW EXECUTE PROCEDURE training_lesson_search_vector_update();
+
+-- Заполняем вектор для уже существующих строк (триггер срабатывает на изменение title)
+UPDATE training_lesson SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS training_lesson_search_vector_update ON training_lesson;
+DROP FUNCTION IF EXISTS training_lesson_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0003_lessonrating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='lesson_search_vector_idx', fastupdate=False),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+    ]
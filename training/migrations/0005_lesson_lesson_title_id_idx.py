@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0004_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['title', 'id'], name='lesson_title_id_idx'),
+        ),
+    ]
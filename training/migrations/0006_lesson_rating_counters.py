@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def count_ratings(apps, schema_editor):
+    Lesson = apps.get_model('training', 'Lesson')
+    LessonRating = apps.get_model('training', 'LessonRating')
+    ratings = LessonRating.objects.filter(lesson=OuterRef('pk')).order_by().values('lesson')
+    Lesson.objects.update(
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0),
+        rating_count=Coalesce(Subquery(ratings.annotate(count=Count('id')).values('count')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0005_lesson_lesson_title_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_ratings, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 import uuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from accounts.admin import CustomUser
 from pets.models import Pet
@@ -11,6 +13,37 @@ class Lesson(models.Model):
     video = models.FileField(upload_to='training_videos/', blank=True, null=True)
     text_content = models.TextField(blank=True)
     cover_image = models.ImageField(upload_to='lesson_covers/', blank=True, null=True)
+    # Заполняется триггером БД из title, description и text_content (миграция 0004), см. pages.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Сумма и число оценок; меняются только через F() в rate_lesson, сверяются командой reconcile_counters
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ['rating_sum', 'rating_count']
+
+    class Meta:
+        indexes = [
+            # Документы меняются редко: без fastupdate поиск не просматривает список отложенных записей
+            GinIndex(fields=['search_vector'], name='lesson_search_vector_idx', fastupdate=False),
+            # Ключ keyset-пагинации каталога (pages.pagination)
+            models.Index(fields=['title', 'id'], name='lesson_title_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None and not self._state.adding:
+            # Счётчики не перезаписываем устаревшим значением из экземпляра (например, из админки)
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def avg_rating(self):
+        """Средняя оценка или None, если оценок нет."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
 
     def __str__(self):
         return self.title
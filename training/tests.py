@@ -1,3 +1,34 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import CustomUser
+
+from .models import Lesson, LessonRating
+
+
+class RatingCountersTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='trainer', email='trainer@example.com', password='x')
+        self.client.force_login(self.user)
+        self.lesson = Lesson.objects.create(title='Сидеть')
+
+    def rate(self, rating):
+        return self.client.post(reverse('training:rate_lesson', args=[self.lesson.id]), {'rating': rating})
+
+    def counters(self):
+        return Lesson.objects.values_list('rating_sum', 'rating_count').get(pk=self.lesson.pk)
+
+    def test_rate_and_change_rating(self):
+        self.rate(4)
+        self.assertEqual(self.counters(), (4, 1))
+        self.rate(2)
+        self.assertEqual(self.counters(), (2, 1))
+
+    def test_lower_rating_with_lagging_sum_stays_at_zero(self):
+        # Оценка создана в обход rate_lesson — сумма и число остались нулевыми
+        LessonRating.objects.create(user=self.user, lesson=self.lesson, rating=5)
+
+        response = self.rate(1)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.counters(), (0, 0))
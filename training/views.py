@@ -4,25 +4,16 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect, get_object_or_404, render
 from .models import Lesson, PetLessonProgress, LessonRating
 from pets.models import Pet
-from django.db.models import Count, Avg
-from django.http import HttpResponseRedirect
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.http import HttpResponseBadRequest, HttpResponseRedirect
 from django.urls import reverse
-import markdown
-import bleach
 from django.utils.safestring import mark_safe
+from pages.pagination import keyset_page
+from pages.rendering import render_markdown
 
-# Определяем разрешённые теги и атрибуты для Bleach
-ALLOWED_TAGS = [
-    'a', 'abbr', 'acronym', 'b', 'blockquote', 'code',
-    'em', 'i', 'li', 'ol', 'strong', 'ul', 'h1', 'h2',
-    'h3', 'h4', 'h5', 'h6', 'p', 'br', 'pre', 'img',
-    'span'
-]
-ALLOWED_ATTRIBUTES = {
-    '*': ['class', 'style'],
-    'a': ['href', 'title'],
-    'img': ['src', 'alt', 'title'],
-}
+LESSON_ORDERING = ('title', 'id')
 
 @login_required
 def toggle_lesson_status(request, pet_id, lesson_id, new_status):
@@ -43,8 +34,19 @@ def toggle_lesson_status(request, pet_id, lesson_id, new_status):
 
 @login_required
 def lesson_list(request):
-    lessons = Lesson.objects.annotate(avg_rating=Avg('ratings__rating')).order_by('title')
-    return render(request, 'training/lesson_list.html', {'lessons': lessons})
+    cursor = request.GET.get('cursor')
+    try:
+        lessons, next_cursor = keyset_page(
+            Lesson.objects.only('id', 'title', 'description', 'cover_image', 'rating_sum', 'rating_count'),
+            LESSON_ORDERING, cursor,
+        )
+    except ValueError:
+        return HttpResponseBadRequest('Неверный курсор')
+    return render(request, 'training/lesson_list.html', {
+        'lessons': lessons,
+        'cursor': cursor,
+        'next_cursor': next_cursor,
+    })
 
 
 @login_required
@@ -69,16 +71,11 @@ def lesson_detail(request, lesson_id):
         except LessonRating.DoesNotExist:
             pass
 
-    average_rating = lesson.ratings.aggregate(avg=Avg('rating'))['avg']
-    ratings_count = lesson.ratings.count()
+    average_rating = lesson.avg_rating
+    ratings_count = lesson.rating_count
 
-    # Преобразование Markdown в HTML и очистка с помощью Bleach
-    if lesson.text_content:
-        html_content = markdown.markdown(lesson.text_content, extensions=['fenced_code', 'codehilite'])
-        cleaned_html = bleach.clean(html_content, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES)
-        processed_text = mark_safe(cleaned_html)
-    else:
-        processed_text = ''
+    # Markdown в HTML через общий кэш отрисовки
+    processed_text = mark_safe(render_markdown(lesson.text_content))
 
     context = {
         'lesson': lesson,
@@ -106,14 +103,24 @@ def rate_lesson(request, lesson_id):
             try:
                 rating = int(rating_value)
                 if 1 <= rating <= 5:
-                    lesson_rating, created = LessonRating.objects.get_or_create(
-                        user=request.user,
-                        lesson=lesson,
-                        defaults={'rating': rating}
-                    )
-                    if not created:
-                        lesson_rating.rating = rating
-                        lesson_rating.save()
+                    with transaction.atomic():
+                        # Строка оценки блокируется, чтобы прежнее значение для поправки суммы не устарело
+                        lesson_rating, created = LessonRating.objects.select_for_update().get_or_create(
+                            user=request.user,
+                            lesson=lesson,
+                            defaults={'rating': rating}
+                        )
+                        if created:
+                            Lesson.objects.filter(pk=lesson.pk).update(
+                                rating_sum=F('rating_sum') + rating, rating_count=F('rating_count') + 1,
+                            )
+                        elif lesson_rating.rating != rating:
+                            Lesson.objects.filter(pk=lesson.pk).update(
+                                # Отставшая сумма не должна уйти ниже нуля (CHECK >= 0)
+                                rating_sum=Greatest(F('rating_sum') + (rating - lesson_rating.rating), 0),
+                            )
+                            lesson_rating.rating = rating
+                            lesson_rating.save(update_fields=['rating'])
 
                     # Формируем URL для редиректа с сохранением выбранного питомца
                     redirect_url = reverse('training:lesson_detail', args=[lesson.id])